@@ -1,46 +1,143 @@
+import array as _array
+import bisect as _bisect
+import contextlib as _contextlib
+import contextvars as _contextvars
+import copy as _copy
 import functools as _functools
+import importlib as _importlib
+import itertools as _itertools
 import logging as _logging
-from typing import (Any as _Any,
+import math as _math
+import operator as _operator
+import os as _os
+import pickle as _pickle
+import sys as _sys
+import threading as _threading
+import types as _types
+import tracemalloc as _tracemalloc
+import weakref as _weakref
+from collections import deque as _deque
+from collections.abc import Hashable as _Hashable, Mapping as _Mapping, Sized as _Sized
+from typing import (TYPE_CHECKING as _TYPE_CHECKING,
+                    Any as _Any,
                     Callable as _Callable, 
+                    Sequence as _Sequence,
+                    Iterable as _Iterable,
+                    Iterator as _Iterator,
+                    NamedTuple as _NamedTuple,
                     ParamSpec as _ParamSpec,
                     TypeVar as _TypeVar, 
                     )
 
+# Modules only needed to run pipes in parallel or on disk are imported where they are used, so that importing pyper3 stays cheap.
+if _TYPE_CHECKING:
+    import multiprocessing as _multiprocessing
+    import multiprocessing.connection as _connection
+    from concurrent.futures import Future as _Future
+    from multiprocessing.shared_memory import SharedMemory as _SharedMemory
+
 _T = _TypeVar('_T')
 _P = _ParamSpec('_P')
 
-def _add_logging(func: _Callable[_P, _T], inplace: bool) -> _Callable[_P, _T]:
-    """A type-safe decorator to add logging to a function."""
-    
-    def lambda_(*args: _P.args, **kwargs: _P.kwargs) -> _T:
-        name_msg = "<functools.partial>" if isinstance(func, _functools.partial) else func.__name__
-        inplace_msg = ' inplace ' if inplace else ' '
-        args_msg = ', '.join(map(repr, args))
-        kwargs_msg = ', '.join(map(lambda item: str(item[0]) + '=' + repr(item[1]), kwargs.items()))
-        name_msg, inplace_msg, args_msg, kwargs_msg = map(lambda msg: msg if len(msg) <= Pipe._MAX_LENGTH else msg[:Pipe._MAX_LENGTH-3] + '...', (name_msg, inplace_msg, args_msg, kwargs_msg))
-        Pipe._logger.debug(f'{name_msg} was called{inplace_msg}with args [{args_msg}] and kwargs {{{kwargs_msg}}}')
-        return func(*args, **kwargs)
-    return lambda_
-
-def _lambdify(func: _Callable[_P, _T], inplace_func: _Callable[..., _Any] | None, loggable: bool) -> _Callable[_P, _T]:
-    """Convert the function to a named lambda function."""
-
-    if inplace_func is not None:
-        def lambda_(*args: _P.args, **kwargs: _P.kwargs):
-            func(*args, **kwargs)
-            return inplace_func(*args) # not actually sure what is going on here
-    else:
-        lambda_ = func
+class _LogConfig(_NamedTuple):
+    """Immutable logging configuration, swapped as a whole so that readers never see it half-updated."""
+    logger: _logging.Logger
+    max_length: int | float
+
+# Process-wide configuration set by `Pipe.setup_logging`, overridden per context by `Pipe.log_context`.
+_default_log_config = _LogConfig(_logging.getLogger(), float("inf"))
+_log_config: _contextvars.ContextVar[_LogConfig | None] = _contextvars.ContextVar('pyper3_log_config', default=None)
+
+def _get_log_config() -> _LogConfig:
+    """Get the logging configuration in effect for the current context."""
+    config = _log_config.get()
+    return _default_log_config if config is None else config
+
+def _log_call(func: _Callable[..., _Any], inplace: bool, args: tuple[_Any, ...], kwargs: dict[str, _Any]) -> None:
+    """Log a call of a piped function, if logging is enabled."""
+    logger, max_length = _get_log_config()
+    if not logger.isEnabledFor(_logging.DEBUG):
+        return
+    name_msg = "<functools.partial>" if isinstance(func, _functools.partial) else func.__name__
+    inplace_msg = ' inplace ' if inplace else ' '
+    args_msg = ', '.join(map(repr, args))
+    kwargs_msg = ', '.join(map(lambda item: str(item[0]) + '=' + repr(item[1]), kwargs.items()))
+    name_msg, inplace_msg, args_msg, kwargs_msg = map(lambda msg: msg if len(msg) <= max_length else msg[:max_length-3] + '...', (name_msg, inplace_msg, args_msg, kwargs_msg))
+    logger.debug(f'{name_msg} was called{inplace_msg}with args [{args_msg}] and kwargs {{{kwargs_msg}}}')
+
+def _view(value: _Any) -> _Any:
+    """Make a copy that shares its underlying data with `value` where the type supports it."""
+    module = type(value).__module__
+    if module.startswith('pandas'):
+        return value.copy(deep=False)
+    if module.startswith('numpy') and hasattr(value, 'view'):
+        return value.view()
+    return _copy.copy(value)
+
+_COPIERS: dict[str, _Callable[[_Any], _Any]] = {
+    "shallow": _copy.copy,
+    "deep": _copy.deepcopy,
+    "view": _view,
+}
+
+# How independent of the original a copy made by each strategy is. A copy may be mutated by stages copying at the same depth or less, so a stage copying deeper than the value was copied copies it again.
+_COPY_DEPTHS: dict[_Callable[[_Any], _Any], int] = {_view: 1, _copy.copy: 2, _copy.deepcopy: 3}
+
+# Whether the pipe owns a value: `False` if not, `True` if the pipe created it itself, or else the copier that copied it.
+_Owned = bool | _Callable[[_Any], _Any]
+
+def _owns(owned: _Owned, copier: _Callable[[_Any], _Any]) -> bool:
+    """Whether a value owned through `owned` may be mutated by a stage copying with `copier` without copying it again. Custom copiers are only satisfied by themselves or a deep copy."""
+    if owned is False:
+        return False
+    if owned is True or owned is copier:
+        return True
+    return _COPY_DEPTHS.get(owned, 0) >= _COPY_DEPTHS.get(copier, 3)
+
+# Functions known not to mutate their arguments. Inplace stages calling these never trigger a copy.
+_READONLY: set[_Any] = {print, repr, str, len, id, hash, type, bool, format, isinstance, sorted, sum, min, max, any, all}
+
+def _get_copier(inplace: "bool | str | _Callable[[_Any], _Any]") -> _Callable[[_Any], _Any] | None:
+    """Resolve an `inplace` argument into a copy function, or `None` if values are not copied."""
+    if isinstance(inplace, bool):
+        return None
+    if isinstance(inplace, str):
+        if inplace not in _COPIERS:
+            raise ValueError(f"Parameter inplace should be a bool, a callable, or one of {list(_COPIERS)}, but got {inplace!r} instead.")
+        return _COPIERS[inplace]
+    if callable(inplace):
+        return inplace
+    raise ValueError(f"Parameter inplace should be a bool, a callable, or one of {list(_COPIERS)}, but got {inplace!r} instead.")
+
+def _is_readonly(func: _Callable[..., _Any]) -> bool:
+    """Whether `func` is known not to mutate its arguments."""
+    return getattr(func, '_pyper3_readonly', False) or (isinstance(func, _Hashable) and func in _READONLY)
+
+class _Attribute:
+    """Function getting an attribute of its first argument, calling it with the remaining arguments if it is callable."""
     
-    if loggable:
-        try:    
-            lambda_ = _functools.update_wrapper(lambda_, func)
-        except (AttributeError, TypeError):
-            pass
-        inplace = inplace_func is not None
-        lambda_ = _add_logging(lambda_, inplace)
+    def __init__(self, attr: str) -> None:
+        """Create an `_Attribute` for a certain attribute name."""
+        self.attr = attr
+        self.__name__ = 'THIS.' + attr
+        
+    def __call__(self, value: _Any, *args: _Any, **kwargs: _Any) -> _Any:
+        member = getattr(value, self.attr)
+        return member(*args, **kwargs) if callable(member) else member
+
+class _Item:
+    """Function getting an item of its argument."""
     
-    return lambda_
+    def __init__(self, item: _Any) -> None:
+        """Create an `_Item` for a certain key."""
+        self.item = item
+        self.__name__ = 'THIS[' + str(item) + ']'
+        
+    def __call__(self, value: _Any) -> _Any:
+        return value[self.item]
+
+# Accessors created by `THIS.attr`, reused so that stages getting the same attribute are identical.
+_attributes: dict[str, _Attribute] = {}
 
 class _THIS: 
     """Type of `THIS` placeholder."""
@@ -49,23 +146,1188 @@ class _THIS:
         pass
 
     def __getattr__(self, attr: str) -> _Any:
-        f = lambda value, *args, **kwargs: getattr(value, attr)(*args, **kwargs) if callable(getattr(value, attr)) else getattr(value, attr)
-        f.__name__ = 'THIS.' + attr
-        return _lambdify(f, inplace_func=None, loggable=False)
+        accessor = _attributes.get(attr)
+        if accessor is None:
+            accessor = _attributes.setdefault(attr, _Attribute(attr))
+        return accessor
 
     def __getitem__(self, item: _Any) -> _Any:
-        f = lambda value: value[item]
-        f.__name__ = 'THIS[' + str(item) + ']'
-        return _lambdify(f, inplace_func=None, loggable=False)
+        return _Item(item)
+    
+    def __reduce__(self) -> str:
+        return 'THIS'
 
 THIS = _THIS()
+
+class _StageSpec(_NamedTuple):
+    """Arguments of a stage as piped, compiled into a `_Stage` when the closed pipe is first used."""
+    func: _Callable[..., _Any]
+    args: tuple[_Any, ...]
+    kwargs: dict[str, _Any]
+    inplace: "bool | str | _Callable[[_Any], _Any]"
+    loggable: bool
+    predicate: _Callable[[_Any], bool] | None
+
+class _Stage:
+    """A single function application within a pipe, with `THIS` already located among its arguments."""
+    
+    __slots__ = ('func', 'head', 'tail', 'kwargs', 'key', 'inplace', 'copier', 'mutates', 'loggable', 'predicate', 'spec', '__weakref__')
+    
+    def __init__(self, func: _Callable[..., _Any], args: tuple[_Any, ...], kwargs: dict[str, _Any], inplace: "bool | str | _Callable[[_Any], _Any]", loggable: bool, predicate: _Callable[[_Any], bool] | None=None) -> None:
+        """Create a `_Stage`, locating `THIS` among the arguments, optionally only applied to values satisfying `predicate`."""
+        self.func = func
+        self.predicate = predicate
+        self.copier = None if inplace is False else _get_copier(inplace)
+        # Whether the function may mutate the value, only needed to decide whether to copy it.
+        self.mutates = self.copier is not None and not _is_readonly(func)
+        self.inplace = bool(inplace) or self.copier is not None
+        self.loggable = loggable
+        self.head: tuple[_Any, ...] = ()
+        self.tail = args
+        self.kwargs = kwargs
+        self.key: str | None = None
+        self.spec: _StageSpec | None = None
+        # `THIS` is found by identity, since arguments such as arrays may not compare to it with `==`.
+        for index, arg in enumerate(args):
+            if arg is THIS:
+                self.head, self.tail = args[:index], args[index+1:]
+                return
+        for var, value in kwargs.items():
+            if value is THIS:
+                self.key = var
+                return
+    
+    def __call__(self, value: _Any) -> _Any:
+        """Apply the function, substituting `value` for `THIS`."""
+        if self.key is not None:
+            args, kwargs = self.head + self.tail, self.kwargs | {self.key: value}
+        else:
+            args, kwargs = (*self.head, value, *self.tail), self.kwargs
+        if self.loggable:
+            _log_call(self.func, self.inplace, args, kwargs)
+        return self.func(*args, **kwargs)
+    
+    def apply(self, value: _Any, owned: _Owned) -> tuple[_Any, _Owned]:
+        """
+        Run the stage on `value`, returning the result and whether the pipe owns it.
+        
+        Notes
+        -----
+        A value is owned when it is a copy made by the pipe itself, so it may be mutated freely. Copies are only made for inplace stages that may mutate a value the pipe does not own, or owns through a shallower copy than theirs, e.g. a `"shallow"` copy before a `"deep"` stage.
+        """
+        if self.predicate is not None and not self.predicate(value):
+            return value, owned
+        if not self.inplace:
+            return self(value), False
+        if self.copier is not None and self.mutates and not _owns(owned, self.copier):
+            value = self.copier(value)
+            owned = self.copier
+        self(value)
+        return value, owned
+    
+# Weak references to compiled stages by the identities of the arguments they were piped with, so that identical specs share one `_Stage`. Each stage keeps its spec alive, so identities are only reused once the stage is collected and its reference is dead.
+_interned_stages: dict[tuple[_Any, ...], _weakref.ref] = {}
+
+# Number of entries in `_interned_stages` above which dead references are removed.
+_interned_stages_limit = 1024
+
+def _compile(spec: _Any) -> _Any:
+    """
+    Get the stage for a spec recorded by `PipeJoiner`, interned by the identities of its arguments. Other stages are already compiled.
+    
+    Notes
+    -----
+    Threads compiling the same spec at once may each get their own stage, which only costs memory.
+    """
+    if type(spec) is not _StageSpec:
+        return spec
+    func, args, kwargs, inplace, loggable, predicate = spec
+    key = (id(func), tuple(map(id, args)), tuple([(var, id(value)) for var, value in kwargs.items()]) if kwargs else (), id(inplace), loggable, id(predicate))
+    ref = _interned_stages.get(key)
+    stage = None if ref is None else ref()
+    if stage is None:
+        stage = _Stage(*spec)
+        stage.spec = spec
+        _interned_stages[key] = _weakref.ref(stage)
+        if len(_interned_stages) > _interned_stages_limit:
+            _sweep_interned_stages()
+    return stage
+
+def _sweep_interned_stages() -> None:
+    """Remove the references to collected stages, raising the limit if most stages are alive so that sweeps stay amortized."""
+    global _interned_stages_limit
+    for key, ref in list(_interned_stages.items()):
+        if ref() is None:
+            _interned_stages.pop(key, None)
+    _interned_stages_limit = max(1024, 2 * len(_interned_stages))
+
+class _Exit:
+    """Marker returned by a stage to skip the remaining stages, with the value to return or whether to drop it."""
+    
+    __slots__ = ('value', 'dropped')
+    
+    def __init__(self, value: _Any, dropped: bool=False) -> None:
+        """Create an `_Exit` with the value to return."""
+        self.value = value
+        self.dropped = dropped
+
+class _Until:
+    """Stage returning the value immediately if it satisfies a predicate."""
+    
+    __slots__ = ('predicate',)
+    
+    def __init__(self, predicate: _Callable[[_Any], bool]) -> None:
+        """Create an `_Until` with a predicate."""
+        self.predicate = predicate
+        
+    def apply(self, value: _Any, owned: _Owned) -> tuple[_Any, _Owned]:
+        """Run the stage on `value`, returning the result and whether the pipe owns it."""
+        return (_Exit(value) if self.predicate(value) else value), owned
+
+class _Filter:
+    """Stage dropping the value if it does not satisfy a predicate."""
+    
+    __slots__ = ('predicate',)
+    
+    def __init__(self, predicate: _Callable[[_Any], bool]) -> None:
+        """Create a `_Filter` with a predicate."""
+        self.predicate = predicate
+        
+    def apply(self, value: _Any, owned: _Owned) -> tuple[_Any, _Owned]:
+        """Run the stage on `value`, returning the result and whether the pipe owns it."""
+        return (value if self.predicate(value) else _Exit(None, dropped=True)), owned
+
+class DeadLetter(_NamedTuple):
+    """Value a pipe failed on, routed to the sink given to `PipeOpening.close` instead of raising."""
+    pipe: str
+    stage: str
+    index: int
+    input: _Any
+    error: BaseException
+
+class _Failed(_NamedTuple):
+    """Marker for a value a pipe failed on, sent back from workers to be routed by the pipe's error policy."""
+    letter: DeadLetter
+
+def _kept(result: _Any, pipe: "PipeClosing") -> tuple[_Any, ...]:
+    """Get the result as a sequence, empty if it was dropped or failed, routing failures by the pipe's error policy."""
+    if type(result) is _Failed:
+        pipe._route(result.letter)
+        return ()
+    return () if type(result) is _Exit else (result,)
+
+def _finish(result: _Any) -> _Any:
+    """Unwrap the value of an early exit, leaving dropped values marked."""
+    return result.value if type(result) is _Exit and not result.dropped else result
+
+class _SharedBuffer(_NamedTuple):
+    """Handle to a buffer copied into a shared memory segment, sent between processes instead of the buffer itself."""
+    name: str
+    kind: str
+    size: int
+    # The format of a `memoryview` or the dtype of an array, with its shape, so that the worker sees the same items.
+    dtype: _Any = None
+    shape: tuple[int, ...] | None = None
+
+# Formats a byte `memoryview` can be cast to, i.e. single native items.
+_CAST_FORMATS = frozenset('cbB?hHiIlLqQnNfdeP') | frozenset('@' + format for format in 'cbB?hHiIlLqQnNfdeP')
+
+def _buffer_kind(value: _Any) -> str | None:
+    """Get the kind of buffer `value` is, or `None` if it cannot be sent through shared memory."""
+    if isinstance(value, (bytes, bytearray)):
+        return type(value).__name__
+    if isinstance(value, memoryview):
+        return 'memoryview' if value.c_contiguous and value.format in _CAST_FORMATS else None
+    if type(value).__module__ == 'numpy' and type(value).__name__ == 'ndarray':
+        return None if value.dtype.hasobject else 'ndarray'
+    return None
+
+def _share(value: _Any, threshold: int | None) -> _Any:
+    """Copy `value` into a new shared memory segment if it is a large enough buffer, returning its handle."""
+    from multiprocessing.shared_memory import SharedMemory as _SharedMemory
+    kind = None if threshold is None else _buffer_kind(value)
+    if kind is None:
+        return value
+    size = value.nbytes if kind in ('ndarray', 'memoryview') else len(value)
+    if size < threshold:
+        return value
+    segment = _SharedMemory(create=True, size=size)
+    if kind == 'ndarray':
+        numpy = _importlib.import_module('numpy')
+        numpy.ndarray(value.shape, value.dtype, buffer=segment.buf)[...] = value
+        handle = _SharedBuffer(segment.name, kind, size, value.dtype, value.shape)
+    elif kind == 'memoryview':
+        segment.buf[:size] = value.cast('B')
+        handle = _SharedBuffer(segment.name, kind, size, value.format, value.shape)
+    else:
+        segment.buf[:size] = memoryview(value).cast('B')
+        handle = _SharedBuffer(segment.name, kind, size)
+    segment.close()
+    return handle
+
+def _attach(handle: _SharedBuffer) -> "tuple[_SharedMemory, _Any]":
+    """Attach to a shared memory segment, returning it with a zero-copy view of its buffer."""
+    from multiprocessing.shared_memory import SharedMemory as _SharedMemory
+    segment = _SharedMemory(name=handle.name)
+    if handle.kind == 'ndarray':
+        numpy = _importlib.import_module('numpy')
+        return segment, numpy.ndarray(handle.shape, numpy.dtype(handle.dtype), buffer=segment.buf)
+    view = segment.buf[:handle.size]
+    if handle.kind == 'memoryview':
+        return segment, view.cast(handle.dtype, handle.shape)
+    return segment, (view.toreadonly() if handle.kind == 'bytes' else view)
+
+def _unshare(handle: _SharedBuffer) -> _Any:
+    """Copy a buffer out of a shared memory segment, then destroy the segment."""
+    segment, view = _attach(handle)
+    try:
+        if handle.kind == 'ndarray':
+            return view.copy()
+        return bytearray(view) if handle.kind == 'bytearray' else bytes(view)
+    finally:
+        if handle.kind != 'ndarray':
+            view.release()
+        del view
+        segment.close()
+        segment.unlink()
+
+def _discard(handle: _Any) -> None:
+    """Destroy the shared memory segment of a handle, if it is one."""
+    from multiprocessing.shared_memory import SharedMemory as _SharedMemory
+    if isinstance(handle, _SharedBuffer):
+        segment = _SharedMemory(name=handle.name)
+        segment.close()
+        segment.unlink()
+
+_worker_pipe: "PipeClosing | None" = None
+_worker_open_segments: "list[_SharedMemory]" = []
+
+def _init_worker(pipe: "PipeClosing") -> None:
+    """Store the pipe run by a worker process, so that it is only sent once per worker."""
+    global _worker_pipe
+    _worker_pipe = pipe
+
+def _close_segments() -> None:
+    """Close the segments attached by a worker, except those still viewed by a value the pipe kept, e.g. in a traceback."""
+    for segment in tuple(_worker_open_segments):
+        try:
+            segment.close()
+        except BufferError:
+            continue
+        _worker_open_segments.remove(segment)
+
+def _run_worker(value: _Any, threshold: int | None) -> _Any:
+    """Run the worker's pipe on a value, receiving and returning large buffers through shared memory."""
+    _close_segments()
+    segment = None
+    if isinstance(value, _SharedBuffer):
+        segment, value = _attach(value)
+    try:
+        # The result may be a view into the input segment, so it is serialized before the segment is closed.
+        result = _share(_finish(_worker_pipe._run_isolated(value)), threshold)
+        del value
+        if type(result) is _Failed:
+            if isinstance(result.letter.input, memoryview):
+                result = _Failed(result.letter._replace(input=result.letter.input.tobytes()))
+            result = _sendable_failure(result)
+        if not isinstance(result, _SharedBuffer):
+            result = _pickle.dumps(result.tobytes() if isinstance(result, memoryview) else result, _pickle.HIGHEST_PROTOCOL)
+        return result
+    finally:
+        if segment is not None:
+            _worker_open_segments.append(segment)
+            _close_segments()
+
+def _collect(future: "_Future", handle: _Any) -> _Any:
+    """Wait for the result of a worker, destroying the segment of its input."""
+    try:
+        result = future.result()
+    finally:
+        _discard(handle)
+    return _unshare(result) if isinstance(result, _SharedBuffer) else _pickle.loads(result)
+
+_Address = str | tuple[str, int]
+
+def _picklable(value: _Any) -> bool:
+    """Whether a value can be pickled, to be sent to another process."""
+    try:
+        _pickle.dumps(value, _pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return False
+    return True
+
+def _unpicklable_error(error: BaseException) -> RuntimeError:
+    """Stand in for an error that cannot be pickled, with its representation and traceback."""
+    import traceback as _traceback
+    return RuntimeError(f"{error!r} could not be pickled, raised from:\n{''.join(_traceback.format_exception(error)).rstrip()}")
+
+def _sendable_failure(failed: _Failed) -> _Failed:
+    """Replace the input of a failure by its representation, and its error by `_unpicklable_error`, where they cannot be pickled."""
+    letter = failed.letter
+    if _picklable(letter):
+        return failed
+    return _Failed(letter._replace(input=letter.input if _picklable(letter.input) else repr(letter.input), error=letter.error if _picklable(letter.error) else _unpicklable_error(letter.error)))
+
+def _sendable(results: list[tuple[bool, _Any]]) -> list[tuple[bool, _Any]]:
+    """Replace what cannot be pickled in the results of a batch, so that the batch still reaches the client."""
+    sendable = []
+    for ok, result in results:
+        if not ok:
+            sendable.append((False, result if _picklable(result) else _unpicklable_error(result)))
+        elif type(result) is _Failed:
+            sendable.append((True, _sendable_failure(result)))
+        elif _picklable(result):
+            sendable.append((True, result))
+        else:
+            sendable.append((False, RuntimeError(f"The result {result!r} could not be pickled to be sent back.")))
+    return sendable
+
+def _serve_connection(conn: "_connection.Connection") -> None:
+    """Serve one client: load pipes sent once by key, then run batches of values through them. A pipe that fails to load, e.g. because a module is missing here, fails every value of its batches with the error."""
+    pipes: dict[str, PipeClosing] = {}
+    load_errors: dict[str, Exception] = {}
+    with conn:
+        while True:
+            try:
+                kind, key, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            if kind == 'load':
+                try:
+                    pipes[key] = _pickle.loads(payload)
+                except Exception as error:
+                    load_errors[key] = error
+                continue
+            if key in load_errors:
+                conn.send_bytes(_pickle.dumps(_sendable([(False, load_errors[key])] * len(payload)), _pickle.HIGHEST_PROTOCOL))
+                continue
+            pipe = pipes[key]
+            results = []
+            for value in payload:
+                try:
+                    results.append((True, _finish(pipe._run_isolated(value))))
+                except Exception as error:
+                    results.append((False, error))
+            try:
+                data = _pickle.dumps(results, _pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                data = _pickle.dumps(_sendable(results), _pickle.HIGHEST_PROTOCOL)
+            conn.send_bytes(data)
+
+def _serve(listener: "_connection.Listener") -> None:
+    """Accept clients forever, serving each in its own thread."""
+    import multiprocessing as _multiprocessing
+    with listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except _multiprocessing.AuthenticationError:
+                continue
+            _threading.Thread(target=_serve_connection, args=(conn,), daemon=True).start()
+
+def _start_worker(address: _Address, authkey: bytes, ready: "_connection.Connection") -> None:
+    """Listen on `address` in a worker process, reporting the bound address through `ready`."""
+    import multiprocessing.connection as _connection
+    listener = _connection.Listener(address, authkey=authkey)
+    ready.send(listener.address)
+    ready.close()
+    _serve(listener)
+
+class _RemoteConnection:
+    """Connection to a worker, with the keys of the pipes it has already loaded."""
+    
+    def __init__(self, address: _Address, authkey: bytes) -> None:
+        """Connect to a worker."""
+        import multiprocessing.connection as _connection
+        self.conn = _connection.Client(address, authkey=authkey)
+        self.loaded: set[str] = set()
+        
+    def run(self, key: str, spec: bytes, batch: list[_Any]) -> list[tuple[bool, _Any]]:
+        """Run a batch of values through a pipe, sending the pipe first if the worker does not have it yet."""
+        if key not in self.loaded:
+            self.conn.send(('load', key, spec))
+            self.loaded.add(key)
+        self.conn.send(('run', key, batch))
+        return self.conn.recv()
+
+# Idle connections to workers, reused across calls to `PipeClosing.map`.
+_connection_pool: dict[tuple[_Address, bytes], list[_RemoteConnection]] = {}
+_connection_pool_lock = _threading.Lock()
+
+def _run_remote(workers: _Sequence[_Address], start: int, authkey: bytes, retries: int, key: str, spec: bytes, batch: list[_Any]) -> list[tuple[bool, _Any]]:
+    """Run a batch on a worker, retrying on the next workers if the connection fails."""
+    error: BaseException | None = None
+    for attempt in range(retries + 1):
+        address = workers[(start + attempt) % len(workers)]
+        pool_key = (address, authkey)
+        with _connection_pool_lock:
+            idle = _connection_pool.get(pool_key)
+            remote = idle.pop() if idle else None
+        try:
+            if remote is None:
+                remote = _RemoteConnection(address, authkey)
+            results = remote.run(key, spec, batch)
+        except (OSError, EOFError) as e:
+            if remote is not None:
+                remote.conn.close()
+            error = e
+            continue
+        with _connection_pool_lock:
+            _connection_pool.setdefault(pool_key, []).append(remote)
+        return results
+    raise ConnectionError(f"Batch failed on {retries + 1} attempts over workers {list(workers)}.") from error
+
+def _drop_connections(address: _Address) -> None:
+    """Close the idle connections to a worker."""
+    with _connection_pool_lock:
+        for pool_key in [pool_key for pool_key in _connection_pool if pool_key[0] == address]:
+            for remote in _connection_pool.pop(pool_key):
+                remote.conn.close()
+
+def _unbatch(results: list[tuple[bool, _Any]], pipe: "PipeClosing") -> _Iterator[_Any]:
+    """Yield the results of a batch, raising the first error and routing failures by the pipe's error policy."""
+    for ok, result in results:
+        if not ok:
+            raise result
+        yield from _kept(result, pipe)
+
+class Aggregator:
+    """Base class of incremental aggregators, which keep a constant amount of state however many values they see."""
+    
+    def add(self, value: _Any) -> None:
+        """Add a value."""
+        raise NotImplementedError
+    
+    def merge(self, other: "Aggregator") -> None:
+        """Add the values seen by another aggregator of the same type."""
+        raise NotImplementedError
+    
+    def result(self) -> _Any:
+        """Get the aggregate of the values so far."""
+        raise NotImplementedError
+
+class Count(Aggregator):
+    """Count values."""
+    
+    def __init__(self) -> None:
+        self.count = 0
+        
+    def add(self, value: _Any) -> None:
+        self.count += 1
+        
+    def merge(self, other: "Count") -> None:
+        self.count += other.count
+        
+    def result(self) -> int:
+        return self.count
+    
+class Sum(Aggregator):
+    """Sum values."""
+    
+    def __init__(self) -> None:
+        self.total = 0
+        
+    def add(self, value: _Any) -> None:
+        self.total += value
+        
+    def merge(self, other: "Sum") -> None:
+        self.total += other.total
+        
+    def result(self) -> _Any:
+        return self.total
+    
+class Mean(Aggregator):
+    """Average values, or `None` if there are none."""
+    
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        
+    def add(self, value: _Any) -> None:
+        self.count += 1
+        self.total += value
+        
+    def merge(self, other: "Mean") -> None:
+        self.count += other.count
+        self.total += other.total
+        
+    def result(self) -> _Any:
+        return self.total / self.count if self.count else None
+    
+class Min(Aggregator):
+    """Minimum of values, or `None` if there are none."""
+    
+    def __init__(self) -> None:
+        self.value: _Any = None
+        
+    def add(self, value: _Any) -> None:
+        if self.value is None or value < self.value:
+            self.value = value
+            
+    def merge(self, other: "Min") -> None:
+        if other.value is not None:
+            self.add(other.value)
+        
+    def result(self) -> _Any:
+        return self.value
+    
+class Max(Aggregator):
+    """Maximum of values, or `None` if there are none."""
+    
+    def __init__(self) -> None:
+        self.value: _Any = None
+        
+    def add(self, value: _Any) -> None:
+        if self.value is None or value > self.value:
+            self.value = value
+            
+    def merge(self, other: "Max") -> None:
+        if other.value is not None:
+            self.add(other.value)
+        
+    def result(self) -> _Any:
+        return self.value
+    
+class Quantile(Aggregator):
+    """
+    Approximate quantile of numeric values, or `None` if there are none.
+    
+    Parameters
+    ----------
+    q: float
+        The quantile, between 0 and 1.
+    size: int, default=64
+        The number of centroids kept. Larger sizes are more accurate and slower.
+        
+    Notes
+    -----
+    Values are summarized by at most `size` centroids of roughly equal weight, merging the adjacent pair with the least weight when there are too many. Quantiles are interpolated between centroids, and are exact while at most `size` values have been seen.
+    """
+    
+    def __init__(self, q: float, size: int=64) -> None:
+        if not 0 <= q <= 1:
+            raise ValueError(f"Parameter q should be between 0 and 1, but got {q} instead.")
+        if size < 2:
+            raise ValueError(f"Parameter size should be at least 2, but got {size} instead.")
+        self.q = q
+        self.size = size
+        self.means: list[float] = []
+        self.weights: list[float] = []
+        
+    def add(self, value: _Any) -> None:
+        index = _bisect.bisect(self.means, value)
+        self.means.insert(index, value)
+        self.weights.insert(index, 1)
+        self._compress()
+        
+    def merge(self, other: "Quantile") -> None:
+        for mean, weight in zip(other.means, other.weights):
+            index = _bisect.bisect(self.means, mean)
+            self.means.insert(index, mean)
+            self.weights.insert(index, weight)
+        self._compress()
+        
+    def _compress(self) -> None:
+        """Merge adjacent centroids with the least combined weight until at most `size` are left."""
+        means, weights = self.means, self.weights
+        while len(means) > self.size:
+            index = min(range(len(weights) - 1), key=lambda i: weights[i] + weights[i+1])
+            weight = weights[index] + weights[index+1]
+            means[index] = (means[index] * weights[index] + means[index+1] * weights[index+1]) / weight
+            weights[index] = weight
+            del means[index+1], weights[index+1]
+            
+    def result(self) -> _Any:
+        means, weights = self.means, self.weights
+        if not means:
+            return None
+        # Each centroid sits at the middle of the cumulative weight it covers.
+        target = self.q * (sum(weights) - 1)
+        position = (weights[0] - 1) / 2
+        if target <= position:
+            return means[0]
+        for i in range(1, len(means)):
+            next_position = position + (weights[i-1] + weights[i]) / 2
+            if target <= next_position:
+                fraction = (target - position) / (next_position - position)
+                return means[i-1] + fraction * (means[i] - means[i-1])
+            position = next_position
+        return means[-1]
+
+class WindowResult(_NamedTuple):
+    """Aggregate of a window emitted by `Pipe.tumbling` or `Pipe.sliding`."""
+    start: _Any
+    key: _Any
+    value: _Any
+
+def _identity(value: _Any) -> _Any:
+    return value
+
+def _no_key(value: _Any) -> None:
+    return None
+
+def _merged(factory: _Callable[[], Aggregator], panes: _Iterable[Aggregator]) -> _Any:
+    """Get the aggregate of several panes, leaving them unchanged."""
+    total = factory()
+    for pane in panes:
+        total.merge(pane)
+    return total.result()
+
+class _StreamState:
+    """Running state of a stream aggregation, picklable for checkpoints without the functions of its `spec`."""
+    
+    def __init__(self, spec: _Any) -> None:
+        self.spec = spec
+        
+    def __getstate__(self) -> dict[str, _Any]:
+        state = self.__dict__.copy()
+        del state['spec']
+        return state
+
+class _CountWindows(_StreamState):
+    """Running state of windows counting values, per key."""
+    
+    def __init__(self, window: "_Window") -> None:
+        super().__init__(window)
+        self.keys: dict[_Any, tuple[_deque[tuple[int, Aggregator]], list[_Any]]] = {}
+        
+    def feed(self, item: _Any) -> list[WindowResult]:
+        """Add an item, returning the windows it completes."""
+        window = self.spec
+        key = window.key(item)
+        if key not in self.keys:
+            # Closed panes as (count, aggregator), and the open pane as [count, aggregator, values seen by the key].
+            self.keys[key] = (_deque(maxlen=window.panes), [0, window.aggregate(), 0])
+        closed, pane = self.keys[key]
+        pane[1].add(window.value(item))
+        pane[0] += 1
+        pane[2] += 1
+        if pane[0] < window.step:
+            return []
+        closed.append((pane[0], pane[1]))
+        pane[0], pane[1] = 0, window.aggregate()
+        if len(closed) < window.panes:
+            return []
+        return [self._emit(key, closed, pane[2])]
+    
+    def _emit(self, key: _Any, closed: _deque[tuple[int, Aggregator]], seen: int) -> WindowResult:
+        return WindowResult(seen - sum(count for count, _ in closed), key, _merged(self.spec.aggregate, (pane for _, pane in closed)))
+        
+    def flush(self) -> list[WindowResult]:
+        """End the stream, returning the windows left partially filled."""
+        results = []
+        for key, (closed, pane) in self.keys.items():
+            # The last window is partial, or was never full so nothing was yielded for the key.
+            if pane[0] or len(closed) < self.spec.panes:
+                if pane[0]:
+                    closed.append((pane[0], pane[1]))
+                results.append(self._emit(key, closed, pane[2]))
+        self.keys.clear()
+        return results
+    
+class _TimeWindows(_StreamState):
+    """Running state of windows over the time of values, per key."""
+    
+    def __init__(self, window: "_Window") -> None:
+        super().__init__(window)
+        self.pane: int | None = None
+        self.keys: dict[_Any, _deque[tuple[int, Aggregator]]] = {}
+        
+    def feed(self, item: _Any) -> list[WindowResult]:
+        """Add an item, returning the windows that ended before it."""
+        window = self.spec
+        pane = int(window.time(item) // window.step)
+        results = []
+        if self.pane is None:
+            self.pane = pane
+        elif pane > self.pane:
+            results = self._close(pane)
+        panes = self.keys.setdefault(window.key(item), _deque())
+        if not panes or panes[-1][0] != self.pane:
+            panes.append((self.pane, window.aggregate()))
+        panes[-1][1].add(window.value(item))
+        return results
     
+    def _close(self, until: int | None) -> list[WindowResult]:
+        """Close panes before `until`, or all of them, emitting the windows ending with each."""
+        window = self.spec
+        results = []
+        while self.keys and (until is None or self.pane < until):
+            first = self.pane - window.panes + 1
+            for key, panes in list(self.keys.items()):
+                results.append(WindowResult(first * window.step, key, _merged(window.aggregate, (pane for index, pane in panes))))
+                if panes[0][0] == first:
+                    panes.popleft()
+                if not panes:
+                    del self.keys[key]
+            self.pane += 1
+        if until is not None:
+            self.pane = until
+        return results
+        
+    def flush(self) -> list[WindowResult]:
+        """End the stream, returning the windows still open."""
+        return self._close(None)
+
+class _Window:
+    """Function aggregating an iterable over tumbling or sliding windows, lazily yielding a `WindowResult` per window and key."""
+    
+    def __init__(self, size: int | float, step: int | float, aggregate: _Callable[[], Aggregator], key: _Callable[[_Any], _Any] | None, value: _Callable[[_Any], _Any] | None, time: _Callable[[_Any], int | float] | None) -> None:
+        # Float sizes and steps are compared up to rounding, since e.g. 0.3 % 0.1 is not 0.
+        if size <= 0 or step <= 0 or not _math.isclose(size / step, round(size / step)):
+            raise ValueError(f"Parameters size and step should be positive, with size a multiple of step, but got {size} and {step} instead.")
+        if time is None and (size != int(size) or step != int(step)):
+            raise ValueError(f"Parameters size and step should be integers when windows count values, but got {size} and {step} instead.")
+        self.size = size
+        self.step = step
+        self.panes = round(size / step)
+        self.aggregate = aggregate
+        self.key = _no_key if key is None else key
+        self.value = _identity if value is None else value
+        self.time = time
+        self.__name__ = f'<pyper3.Pipe.{"tumbling" if size == step else "sliding"}>'
+        
+    def start(self) -> "_CountWindows | _TimeWindows":
+        """Start aggregating a stream."""
+        return _CountWindows(self) if self.time is None else _TimeWindows(self)
+        
+    def __call__(self, values: _Iterable[_Any]) -> _Iterator[WindowResult]:
+        windows = self.start()
+        for item in values:
+            yield from windows.feed(item)
+        yield from windows.flush()
+        
+class _RunningAggregates(_StreamState):
+    """Running state of aggregates, per key."""
+    
+    def __init__(self, running: "_Running") -> None:
+        super().__init__(running)
+        self.keys: dict[_Any, Aggregator] = {}
+        
+    def feed(self, item: _Any) -> list[_Any]:
+        """Add an item, returning the aggregate of its key."""
+        running = self.spec
+        key = None if running.key is None else running.key(item)
+        if key not in self.keys:
+            self.keys[key] = running.aggregate()
+        aggregator = self.keys[key]
+        aggregator.add(running.value(item))
+        return [aggregator.result() if running.key is None else (key, aggregator.result())]
+    
+    def flush(self) -> list[_Any]:
+        """End the stream."""
+        return []
+
+class _Running:
+    """Function lazily yielding the running aggregate of an iterable after each value, per key."""
+    
+    def __init__(self, aggregate: _Callable[[], Aggregator], key: _Callable[[_Any], _Any] | None, value: _Callable[[_Any], _Any] | None) -> None:
+        self.aggregate = aggregate
+        self.key = key
+        self.value = _identity if value is None else value
+        self.__name__ = '<pyper3.Pipe.running>'
+        
+    def start(self) -> _RunningAggregates:
+        """Start aggregating a stream."""
+        return _RunningAggregates(self)
+        
+    def __call__(self, values: _Iterable[_Any]) -> _Iterator[_Any]:
+        aggregates = self.start()
+        for item in values:
+            yield from aggregates.feed(item)
+
+@_functools.cache
+def _numpy() -> _Any:
+    """Get the `numpy` module, or `None` if it is not installed."""
+    try:
+        return _importlib.import_module('numpy')
+    except ImportError:
+        return None
+
+# Functions that apply elementwise when called on a whole NumPy array, besides NumPy ufuncs.
+_VECTORIZED: set[_Any] = {_operator.add, _operator.sub, _operator.mul, _operator.truediv, _operator.floordiv, _operator.mod, _operator.pow, _operator.neg, _operator.pos, _operator.abs, _operator.invert, _operator.and_, _operator.or_, _operator.xor, _operator.lt, _operator.le, _operator.eq, _operator.ne, _operator.ge, _operator.gt, abs}
+
+def _is_vectorized(func: _Callable[..., _Any]) -> bool:
+    """Whether `func` applies elementwise to a whole NumPy array, returning one array. Ufuncs with several outputs, e.g. `numpy.divmod`, return a tuple of arrays instead."""
+    return (type(func).__name__ == 'ufunc' and func.nout == 1) or (isinstance(func, _Hashable) and func in _VECTORIZED)
+
+def _column(values: list[_Any]) -> _Any:
+    """Store values as a column: a NumPy array, or else an `array.array`, if they are all `int` within 64 bits or all `float`, and a list otherwise, so that no value changes type."""
+    if not values:
+        return values
+    if all(type(value) is int for value in values):
+        if not all(-(1 << 63) <= value < (1 << 63) for value in values):
+            return values
+        typecode = 'q'
+    elif all(type(value) is float for value in values):
+        typecode = 'd'
+    else:
+        return values
+    numpy = _numpy()
+    if numpy is not None:
+        return numpy.asarray(values, dtype=numpy.int64 if typecode == 'q' else numpy.float64)
+    return _array.array(typecode, values)
+
+def _elements(value: _Any) -> list[_Any]:
+    """Get the elements of a column, or the rows of a batch, as a list."""
+    if isinstance(value, Batch):
+        return value.rows()
+    if isinstance(value, list):
+        return value
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return list(value)
+
+class _Row(dict):
+    """Row of a batch, whose columns are also attributes."""
+    
+    __slots__ = ()
+    
+    def __getattr__(self, attr: str) -> _Any:
+        if attr in self:
+            return self[attr]
+        raise AttributeError(attr)
+
+class Batch:
+    """
+    Named columns of equal length, run through closed pipes at once by `PipeClosing.map_batch`.
+    
+    Lists of numbers are stored as NumPy arrays if NumPy is installed, or else as `array.array`, and other columns as lists.
+    """
+    
+    def __init__(self, columns: dict[str, _Any]) -> None:
+        """Create a `Batch` from its columns."""
+        self.columns = {name: _column(column) if isinstance(column, list) else column for name, column in columns.items()}
+        lengths = set(map(len, self.columns.values()))
+        if len(lengths) > 1:
+            raise ValueError(f"Columns should all have the same length, but got lengths {sorted(lengths)} instead.")
+        self.length = lengths.pop() if lengths else 0
+    
+    @classmethod
+    def from_records(cls, records: _Iterable[_Any], columns: _Sequence[str] | None=None) -> "Batch":
+        """
+        Create a `Batch` from records, either mappings or objects with the columns as attributes.
+        
+        Parameters
+        ----------
+        records: Iterable[Any]
+            The records, each becoming a row.
+        columns: Sequence[str] | None, default=None
+            The columns to keep. If `None`, the keys of the first record, which must then be a mapping.
+        """
+        records = list(records)
+        if columns is None:
+            columns = list(records[0]) if records else []
+        if records and isinstance(records[0], _Mapping):
+            return cls({name: [record[name] for record in records] for name in columns})
+        return cls({name: [getattr(record, name) for record in records] for name in columns})
+    
+    def __len__(self) -> int:
+        return self.length
+    
+    def __getitem__(self, name: str) -> _Any:
+        return self.columns[name]
+    
+    def __repr__(self) -> str:
+        return f"<pyper3.Batch of {self.length} rows with columns {list(self.columns)}>"
+    
+    def rows(self) -> list[_Row]:
+        """Get the rows, whose columns may be accessed as items or attributes."""
+        names = list(self.columns)
+        return [_Row(zip(names, row)) for row in zip(*map(_elements, self.columns.values()))] if names else [_Row() for _ in range(self.length)]
+
+def _select(stage: _Any, value: _Any) -> _Any:
+    """Get the column a stage selects from a batch with `THIS[name]` or `THIS.name`, or `None` if it does not."""
+    if not isinstance(value, Batch) or type(stage) is not _Stage or stage.predicate is not None or stage.inplace or stage.head or stage.tail or stage.kwargs:
+        return None
+    func = stage.func
+    name = func.item if type(func) is _Item else func.attr if type(func) is _Attribute else None
+    if not isinstance(name, str) or name not in value.columns:
+        return None
+    if stage.loggable:
+        _log_call(func, False, (value,), {})
+    return value.columns[name]
+
+class _PrefixNode(_NamedTuple):
+    """Node of the tree of stages shared by several pipes, reached after the stages on its path."""
+    finished: tuple[int, ...]
+    branches: tuple[tuple[_Any, "_PrefixNode"], ...]
+    indices: tuple[int, ...]
+
+def _prefix_tree(pipes: tuple["PipeClosing", ...]) -> _PrefixNode:
+    """Build the tree of stages of several pipes, merging stages they share, i.e. those piped into the same `PipeOpening`. It takes time linear in the number of stages, so it is built on each call rather than cached, which would keep the pipes alive."""
+    def build(members: list[tuple[int, "PipeClosing"]], depth: int) -> _PrefixNode:
+        finished = tuple(index for index, pipe in members if len(pipe.specs) == depth)
+        groups: dict[int, tuple[_Any, list[tuple[int, "PipeClosing"]]]] = {}
+        for index, pipe in members:
+            if len(pipe.specs) > depth:
+                groups.setdefault(id(pipe.specs[depth]), (pipe.stages[depth], []))[1].append((index, pipe))
+        branches = tuple((stage, build(group, depth + 1)) for stage, group in groups.values())
+        return _PrefixNode(finished, branches, tuple(index for index, _ in members))
+    return build(list(enumerate(pipes)), 0)
+
+def _sizeof(value: _Any) -> int:
+    """Estimate the memory used by a value: exactly for buffers and arrays, otherwise from its own size and that of its items."""
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = _sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(map(_sys.getsizeof, value))
+    elif isinstance(value, dict):
+        size += sum(map(_sys.getsizeof, value.keys())) + sum(map(_sys.getsizeof, value.values()))
+    return size
+
+def _is_array(value: _Any) -> bool:
+    """Whether `value` is a NumPy array that can be memory mapped."""
+    numpy = _numpy()
+    return numpy is not None and isinstance(value, numpy.ndarray) and not value.dtype.hasobject
+
+class _Spill:
+    """Value pickled to a temporary file, loaded back and deleted by `_unspill`."""
+    
+    __slots__ = ('path',)
+    
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+def _spill(value: _Any, directory: str | None) -> _Any:
+    """
+    Move a value to disk, returning a NumPy memory map of the same array, or else a `_Spill`.
+    
+    Notes
+    -----
+    The file of a memory map is deleted right away, so the data lives on disk until the array is collected and is paged into memory only as it is read.
+    """
+    import tempfile as _tempfile
+    if _is_array(value):
+        fd, path = _tempfile.mkstemp(suffix='.npy', prefix='pyper3-', dir=directory)
+        _os.close(fd)
+        mapped = _numpy().lib.format.open_memmap(path, mode='w+', dtype=value.dtype, shape=value.shape)
+        mapped[...] = value
+        _os.unlink(path)
+        return mapped
+    fd, path = _tempfile.mkstemp(suffix='.pickle', prefix='pyper3-', dir=directory)
+    with _os.fdopen(fd, 'wb') as file:
+        _pickle.dump(value, file, _pickle.HIGHEST_PROTOCOL)
+    return _Spill(path)
+
+def _unspill(value: _Any) -> _Any:
+    """Load a value moved to disk by `_spill`, if it is a `_Spill`."""
+    if type(value) is not _Spill:
+        return value
+    with open(value.path, 'rb') as file:
+        loaded = _pickle.load(file)
+    _os.unlink(value.path)
+    return loaded
+
+def _stage_name(stage: _Any) -> str:
+    """Get the name of a stage for reports."""
+    if type(stage) is _Until:
+        return '<pyper3.until>'
+    if type(stage) is _Filter:
+        return '<pyper3.filter>'
+    func = stage.func
+    return "<functools.partial>" if isinstance(func, _functools.partial) else getattr(func, '__name__', repr(func))
+
+class StageMemory(_NamedTuple):
+    """Memory used by a stage, reported by `PipeClosing.run_budgeted`."""
+    name: str
+    peak: int
+    size: int
+    spilled: bool
+
+class BudgetedRun(_NamedTuple):
+    """Result of `PipeClosing.run_budgeted`, with the memory used by each stage that ran."""
+    value: _Any
+    stages: list[StageMemory]
+
+def _read_source(source: "str | _os.PathLike[str] | _Iterable[_Any]", offset: int, encoding: str) -> _Iterator[tuple[_Any, int]]:
+    """Read a stream from an offset, yielding each item with the offset right after it: a byte offset for files, or else a count."""
+    if isinstance(source, (str, _os.PathLike)):
+        with open(source, 'rb') as file:
+            file.seek(offset)
+            for line in file:
+                offset += len(line)
+                yield line.decode(encoding), offset
+        return
+    for offset, item in enumerate(_itertools.islice(source, offset, None), offset + 1):
+        yield item, offset
+
+def _describe_source(source: "str | _os.PathLike[str] | _Iterable[_Any]") -> tuple[str, str]:
+    """Describe the source of a stream, to check that a checkpoint is resumed on the same one: a file by its path, and an iterable by its type."""
+    if isinstance(source, (str, _os.PathLike)):
+        return ('file', _os.path.abspath(source))
+    return ('iterable', f'{type(source).__module__}.{type(source).__qualname__}')
+
+def _describe_function(func: _Callable[..., _Any] | None) -> str | None:
+    """Describe a function by its qualified name, or by its name for accessors such as `THIS[name]`."""
+    if func is None:
+        return None
+    name = getattr(func, '__qualname__', None) or getattr(func, '__name__', None) or type(func).__qualname__
+    return f'{getattr(func, "__module__", None) or type(func).__module__}.{name}'
+
+def _describe_aggregate(aggregate: "_Window | _Running | None") -> tuple[_Any, ...] | None:
+    """Describe the aggregation of a stream, to check that a checkpoint is resumed with state of the same shape: the kind of window, the type of its aggregators and the functions getting keys and values."""
+    if aggregate is None:
+        return None
+    described = (_describe_function(type(aggregate.aggregate())), _describe_function(aggregate.key), _describe_function(aggregate.value))
+    if isinstance(aggregate, _Window):
+        return (aggregate.__name__, 'count' if aggregate.time is None else 'time', aggregate.size, aggregate.step, *described, _describe_function(aggregate.time))
+    return (aggregate.__name__, *described)
+
+def _save_checkpoint(path: "str | _os.PathLike[str]", checkpoint: dict[str, _Any]) -> None:
+    """Write a checkpoint atomically, so that a crash leaves either the old or the new checkpoint."""
+    import tempfile as _tempfile
+    directory = _os.path.dirname(_os.path.abspath(path))
+    fd, temporary = _tempfile.mkstemp(prefix='.pyper3-', suffix='.checkpoint', dir=directory)
+    try:
+        with _os.fdopen(fd, 'wb') as file:
+            _pickle.dump(checkpoint, file, _pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            _os.fsync(file.fileno())
+        _os.replace(temporary, path)
+    except BaseException:
+        _os.unlink(temporary)
+        raise
+
+def _load_checkpoint(path: "str | _os.PathLike[str]") -> dict[str, _Any] | None:
+    """Read a checkpoint, or `None` if there is none."""
+    if not _os.path.exists(path):
+        return None
+    with open(path, 'rb') as file:
+        return _pickle.load(file)
+
+def _run_stages(stages: tuple[_Any, ...], value: _Any, owned: _Owned, start: int) -> _Any:
+    """Run stages from `start` on a value, stopping early if one returns an `_Exit`. Errors are marked with the index of the stage raising them."""
+    index = start
+    try:
+        for stage in stages[start:] if start else stages:
+            value, owned = stage.apply(value, owned)
+            if type(value) is _Exit:
+                return value
+            index += 1
+    except Exception as error:
+        error._pyper3_index = index
+        raise
+    return value
+
+def _dead_letter(pipe: "PipeClosing", value: _Any, error: Exception) -> DeadLetter:
+    """Describe the failure of a pipe on a value, with the index of the stage marked on the error by `_run_stages`.
+    
+    Stages are looked up by index rather than identity, since equal stages are interned and may appear more than once in a pipe.
+    """
+    index = getattr(error, '_pyper3_index', -1)
+    return DeadLetter(pipe.name, _stage_name(pipe.stages[index]) if index >= 0 else '<unknown>', index, value, error)
+
+# Maximum number of input types a pipe is specialized for, beyond which other types always take the generic path.
+_MAX_SPECIALIZED_TYPES = 8
+
+# Maximum number of input types a pipe counts calls for while warming up, beyond which the counts are forgotten, so that types created on the fly are not kept alive.
+_MAX_COUNTED_TYPES = 64
+
+# Flag of types whose attributes cannot be set, so methods resolved from them stay valid.
+_TPFLAGS_IMMUTABLETYPE = 1 << 8
+
+def _resolve_method(cls: type, attr: str) -> _Any:
+    """Get the function implementing method `attr` of instances of `cls`, or `None` if the attribute is not a method, an instance could shadow it, or the class could be changed later."""
+    if cls.__dictoffset__ or not all(base.__flags__ & _TPFLAGS_IMMUTABLETYPE for base in cls.__mro__):
+        return None
+    getattribute = next(base.__dict__['__getattribute__'] for base in cls.__mro__ if '__getattribute__' in base.__dict__)
+    if not isinstance(getattribute, _types.WrapperDescriptorType):
+        return None
+    for base in cls.__mro__:
+        if attr in base.__dict__:
+            member = base.__dict__[attr]
+            if isinstance(member, (_types.FunctionType, _types.MethodDescriptorType, _types.WrapperDescriptorType)):
+                return member
+            return None
+    return None
+
+def _specialize(stage: _Any, cls: type) -> _Callable[[_Any, _Owned], tuple[_Any, _Owned]]:
+    """Build a step running a stage on values of type `cls` as directly as possible, equivalent to `stage.apply`."""
+    if type(stage) is not _Stage or stage.predicate is not None or stage.inplace or stage.key is not None or stage.head:
+        return stage.apply
+    func, tail, kwargs, loggable = stage.func, stage.tail, stage.kwargs, stage.loggable
+    target = func
+    if type(func) is _Attribute:
+        method = _resolve_method(cls, func.attr)
+        if method is not None:
+            target = method
+    if loggable:
+        def step(value: _Any, owned: _Owned) -> tuple[_Any, _Owned]:
+            _log_call(func, False, (value, *tail), kwargs)
+            return target(value, *tail, **kwargs), False
+    elif kwargs:
+        step = lambda value, owned: (target(value, *tail, **kwargs), False)
+    elif tail:
+        step = lambda value, owned: (target(value, *tail), False)
+    else:
+        step = lambda value, owned: (target(value), False)
+    return step
+
+class _Specialization:
+    """
+    Fast paths of a pipe learned per input type after a warm-up, each with the type expected before each stage.
+    
+    Notes
+    -----
+    Paths are only added, never changed, so threads may read them while another thread adds one. Calls are no longer counted once the paths are full, and counts are forgotten once there are too many types, so that pipes seeing many short-lived types do not keep them alive.
+    """
+    
+    def __init__(self, warmup: int) -> None:
+        self.warmup = warmup
+        self.counts: dict[type, int] = {}
+        self.paths: dict[type, tuple[tuple[type, _Callable[[_Any, _Owned], tuple[_Any, _Owned]]], ...]] = {}
+        
+    def run(self, stages: tuple[_Any, ...], value: _Any) -> _Any:
+        """Run stages on a value, through the path learned for its type if there is one."""
+        cls = type(value)
+        path = self.paths.get(cls)
+        if path is None:
+            if len(self.paths) >= _MAX_SPECIALIZED_TYPES:
+                return _run_stages(stages, value, False, 0)
+            count = self.counts.get(cls, 0) + 1
+            if count < self.warmup:
+                if count == 1 and len(self.counts) >= _MAX_COUNTED_TYPES:
+                    self.counts.clear()
+                self.counts[cls] = count
+                return _run_stages(stages, value, False, 0)
+            self.counts.pop(cls, None)
+            return self._learn(stages, value)
+        owned = False
+        for index, (expected, step) in enumerate(path):
+            if type(value) is not expected:
+                return _run_stages(stages, value, owned, index)
+            try:
+                value, owned = step(value, owned)
+            except Exception as error:
+                error._pyper3_index = index
+                raise
+            if type(value) is _Exit:
+                return value
+        return _run_stages(stages, value, owned, len(path)) if len(path) < len(stages) else value
+    
+    def _learn(self, stages: tuple[_Any, ...], value: _Any) -> _Any:
+        """Run stages on a value, learning a path for its type from the types seen before each stage."""
+        cls = type(value)
+        path = []
+        owned = False
+        try:
+            for index, stage in enumerate(stages):
+                path.append((type(value), _specialize(stage, type(value))))
+                value, owned = stage.apply(value, owned)
+                if type(value) is _Exit:
+                    break
+        except Exception as error:
+            error._pyper3_index = index
+            raise
+        self.paths[cls] = tuple(path)
+        return value
+
 class Pipe:
     """Class for beginning pipes."""
     
-    _logger = _logging.getLogger()
-    _MAX_LENGTH = float("inf")
-    
     @classmethod
     def push(cls, value: _Any) -> "PipeInput":
         """Push a specific value into the pipe."""
@@ -74,10 +1336,10 @@ class Pipe:
     @classmethod
     def open(cls, name: str="<pyper3.Pipe>") -> "PipeOpening":
         """Open a pipe that accepts a certain input. Optionally, name it."""
-        return PipeOpening(name, lambda value: value)
+        return PipeOpening(name, ())
     
     @classmethod
-    def join(cls, *funcs: _Callable[..., _Any], name: str="<pyper3.Pipe>", inplace: bool=False, loggable: bool=True) -> _Callable[[_Any], _Any]:
+    def join(cls, *funcs: _Callable[..., _Any], name: str="<pyper3.Pipe>", inplace: "bool | str | _Callable[[_Any], _Any]"=False, loggable: bool=True) -> _Callable[[_Any], _Any]:
         """
         Join several univariate functions.
         
@@ -87,31 +1349,210 @@ class Pipe:
             The functions to be piped.
         name: str, default="<pyper3.Pipe>"
             The name of the pipe.
-        inplace: bool, default=False
-            Whether or not the function should return the original object.
+        inplace: bool | str | Callable[[Any], Any], default=False
+            Whether or not the function should return the original object. See `PipeOpening.pipe`.
         loggable: bool, default=True
             Whether or not the function should be loggable if logging is enabled.
             
         Notes
         -----
-        When `inplace`, the pipe returns the original object and not a copy. The function is applied first, then the object is returned.
+        When `inplace` is `True`, the pipe returns the original object and not a copy. The function is applied first, then the object is returned. With a copy strategy, the returned object is the copy the function was applied to.
         """
         
         if len(funcs) < 1:
             raise ValueError(f"There must be at least one function to join: funcs={funcs}")
         
-        opened_pipe = Pipe.open(name)
-        for func in funcs:
-            opened_pipe = opened_pipe.pipe(func, loggable=loggable)()
-        closed_pipe = opened_pipe.close()
+        _get_copier(inplace)
+        closed_pipe = PipeClosing(name, tuple(_StageSpec(func, (), {}, False, loggable, None) for func in funcs))
+        
+        return PipeClosing(name, (_StageSpec(closed_pipe, (), {}, inplace, loggable, None),))
+    
+    @classmethod
+    def exit(cls, value: _Any) -> _Any:
+        """
+        Return this from a piped function to skip the remaining stages of the pipe, returning `value` immediately.
+        
+        Notes
+        -----
+        This only exits the innermost pipe, so a closed pipe piped into another pipe returns `value` to the outer pipe, which continues. It has no effect from inplace stages, since their results are discarded.
+        """
+        return _Exit(value)
+    
+    @classmethod
+    def vectorized(cls, func: _Callable[_P, _T]) -> _Callable[_P, _T]:
+        """
+        Mark a function as applying elementwise when called on a whole NumPy array, so that `PipeClosing.map_batch` calls it once per column rather than once per element. Usable as a decorator.
+        
+        Notes
+        -----
+        NumPy ufuncs and arithmetic and comparison functions from `operator` are already marked. The function must be hashable.
+        """
+        _VECTORIZED.add(func)
+        return func
+    
+    @classmethod
+    def evaluate_all(cls, pipes: _Sequence["PipeClosing"], value: _Any, *, memory_budget: int | None=None, spill_directory: str | None=None) -> list[_Any]:
+        """
+        Run several closed pipes on the same value, running stages they share only once.
+        
+        Parameters
+        ----------
+        pipes: Sequence[PipeClosing]
+            The pipes, e.g. several pipes closed from the same `PipeOpening`.
+        value: Any
+            The value to run them on.
+        memory_budget: int | None, default=None
+            Size in bytes above which the result of a shared stage is moved to disk while other branches run. If `None`, nothing is moved.
+        spill_directory: str | None, default=None
+            Where to write values moved to disk. If `None`, the default temporary directory.
+            
+        Notes
+        -----
+        Stages are shared when they are the same stages, i.e. pipes branching from a common `PipeOpening`, not merely the same functions. The result of a shared stage is passed to every branch, so stages after a branch which mutate it with `inplace=True` are seen by the other branches, unless it was moved to disk, in which case each branch loads its own copy. Copying inplace stages always copy it, however. The results are the same as calling each pipe otherwise.
+        
+        Branches run one at a time, depth first, so only the results of shared stages still needed by later branches are kept. NumPy arrays moved to disk are memory mapped, and other values are pickled.
+        """
+        if memory_budget is not None and memory_budget < 1:
+            raise ValueError(f"Parameter memory_budget should be at least 1, but got {memory_budget} instead.")
+        pipes = tuple(pipes)
+        results: list[_Any] = [None] * len(pipes)
+        stack = [(_prefix_tree(pipes), value, False, 0)]
+        try:
+            while stack:
+                node, value, owned, branch = stack.pop()
+                value = _unspill(value)
+                if branch == 0:
+                    for index in node.finished:
+                        results[index] = value
+                # A value passed on to several branches or results is shared, so it must not be mutated without a copy.
+                if len(node.finished) + len(node.branches) > 1:
+                    owned = False
+                if branch + 1 < len(node.branches):
+                    spilled = memory_budget is not None and _sizeof(value) > memory_budget
+                    stack.append((node, _spill(value, spill_directory) if spilled else value, owned, branch + 1))
+                if branch < len(node.branches):
+                    stage, child = node.branches[branch]
+                    result, result_owned = stage.apply(value, owned)
+                    del value
+                    if type(result) is _Exit:
+                        for index in child.indices:
+                            results[index] = result.value
+                    else:
+                        stack.append((child, result, result_owned, 0))
+        finally:
+            for _, value, _, _ in stack:
+                if type(value) is _Spill:
+                    _os.unlink(value.path)
+        return results
+    
+    @classmethod
+    def readonly(cls, func: _Callable[_P, _T]) -> _Callable[_P, _T]:
+        """
+        Mark a function as never mutating its arguments, so that copying inplace stages skip the copy. Usable as a decorator.
+        
+        Notes
+        -----
+        Builtins such as `print`, `len` and `repr`, as well as `THIS[...]`, are already marked. The function must be hashable.
+        """
+        _READONLY.add(func)
+        return func
+    
+    @classmethod
+    def start_workers(cls, count: int=1, *, family: str="AF_UNIX", authkey: bytes | None=None) -> "PipeWorkers":
+        """
+        Start local worker processes that run closed pipes sent over sockets. See `PipeClosing.map`.
+        
+        Parameters
+        ----------
+        count: int, default=1
+            The number of worker processes.
+        family: str, default="AF_UNIX"
+            `"AF_UNIX"` to listen on Unix sockets, or `"AF_INET"` to listen on TCP on localhost.
+        authkey: bytes | None, default=None
+            Key authenticating clients. If `None`, the key of the current process is used.
+        """
+        import multiprocessing as _multiprocessing
+        import multiprocessing.connection as _connection
+        if count < 1:
+            raise ValueError(f"Parameter count should be at least 1, but got {count} instead.")
+        if family not in ("AF_UNIX", "AF_INET"):
+            raise ValueError(f"Parameter family should be one of ['AF_UNIX', 'AF_INET'], but got {family!r} instead.")
+        if authkey is None:
+            authkey = _multiprocessing.current_process().authkey
         
-        inplace_func = (lambda value: value) if inplace else None
-        return _lambdify(closed_pipe, inplace_func, loggable=loggable)
+        processes, addresses = [], []
+        for _ in range(count):
+            address = ('127.0.0.1', 0) if family == "AF_INET" else _connection.arbitrary_address(family)
+            receiver, sender = _multiprocessing.Pipe(duplex=False)
+            process = _multiprocessing.Process(target=_start_worker, args=(address, authkey, sender), daemon=True)
+            process.start()
+            sender.close()
+            processes.append(process)
+            addresses.append(receiver.recv())
+            receiver.close()
+        return PipeWorkers(processes, addresses)
+    
+    @classmethod
+    def serve(cls, address: _Address, *, authkey: bytes) -> None:
+        """
+        Run closed pipes sent over sockets, forever. Use this to start workers on other machines. See `PipeClosing.map`.
+        
+        Parameters
+        ----------
+        address: str | tuple[str, int]
+            A Unix socket path, or a `(host, port)` pair to listen on.
+        authkey: bytes
+            Key authenticating clients. Pipes are sent pickled, so only share it with trusted clients.
+        """
+        import multiprocessing.connection as _connection
+        _serve(_connection.Listener(address, authkey=authkey))
+    
+    @classmethod
+    def tumbling(cls, size: int | float, aggregate: _Callable[[], Aggregator], *, key: _Callable[[_Any], _Any] | None=None, value: _Callable[[_Any], _Any] | None=None, time: _Callable[[_Any], int | float] | None=None) -> _Callable[[_Iterable[_Any]], _Iterator[WindowResult]]:
+        """
+        Aggregate an iterable over consecutive, non-overlapping windows. Pipe a stream into the result, e.g. from `PipeClosing.map`.
+        
+        Parameters
+        ----------
+        size: int | float
+            The number of values in each window, or its duration if `time` is given.
+        aggregate: Callable[[], Aggregator]
+            Creates an empty aggregator, e.g. `Mean` or `functools.partial(Quantile, 0.99)`.
+        key: Callable[[Any], Any] | None, default=None
+            Groups values by key, each with its own windows. If `None`, all values are in one group.
+        value: Callable[[Any], Any] | None, default=None
+            Gets what to aggregate from each value, e.g. `THIS['price']`. If `None`, values are aggregated as is.
+        time: Callable[[Any], int | float] | None, default=None
+            Gets the time of each value, in which case windows span `size` units of time aligned to multiples of `size`. Values should arrive in time order, and late values are added to the current window.
+            
+        Notes
+        -----
+        Each window yields a `WindowResult` of its start, i.e. the position of its first value within its group or its start time, its key and its aggregate, as soon as it ends. Windows left open when the iterable ends are yielded last. Only one aggregator per key is kept at a time.
+        """
+        return _Window(size, size, aggregate, key, value, time)
+    
+    @classmethod
+    def sliding(cls, size: int | float, step: int | float, aggregate: _Callable[[], Aggregator], *, key: _Callable[[_Any], _Any] | None=None, value: _Callable[[_Any], _Any] | None=None, time: _Callable[[_Any], int | float] | None=None) -> _Callable[[_Iterable[_Any]], _Iterator[WindowResult]]:
+        """
+        Aggregate an iterable over overlapping windows of `size` values, one every `step` values. See `Pipe.tumbling`.
+        
+        Notes
+        -----
+        `size` must be a multiple of `step`. Each key keeps one aggregator per `step` values, i.e. `size / step` aggregators, which are merged for each window. Windows counting values are only yielded once full, apart from the last window of each key when the iterable ends.
+        """
+        return _Window(size, step, aggregate, key, value, time)
+    
+    @classmethod
+    def running(cls, aggregate: _Callable[[], Aggregator], *, key: _Callable[[_Any], _Any] | None=None, value: _Callable[[_Any], _Any] | None=None) -> _Callable[[_Iterable[_Any]], _Iterator[_Any]]:
+        """
+        Lazily yield the aggregate of an iterable so far after each value, or `(key, aggregate)` for the key of the value if `key` is given. See `Pipe.tumbling`.
+        """
+        return _Running(aggregate, key, value)
     
     @classmethod
     def setup_logging(cls, name: str, level: int=_logging.DEBUG, fmt: str='%(name)s/%(levelname)s: %(message)s', max_length: int | float | None =float("inf")) -> None:
         """
-        Enable logging.
+        Enable logging for every thread, unless overridden by `Pipe.log_context`.
         
         Parameters
         ----------
@@ -124,27 +1565,61 @@ class Pipe:
         max_length: int | float | None, default=float("inf")
             The max length of each part of a logging message, i.e. name, inplace, args, kwargs. Must be at least 3.
         """
-        cls._logger = _logging.getLogger(name)
-        cls._logger.setLevel(level)
+        global _default_log_config
+        
+        if max_length is None:
+            max_length = float("inf")
+        if max_length < 3 or (isinstance(max_length, float) and max_length != float("inf")):
+            raise ValueError(f"Parameter max_length should be an integer that is at least 3, but got {max_length} instead.")
+        
+        logger = _logging.getLogger(name)
+        logger.setLevel(level)
 
         handler = _logging.StreamHandler()
         handler.setFormatter(_logging.Formatter(fmt))
-        cls._logger.addHandler(handler)
+        logger.addHandler(handler)
         
-        if max_length < 3 or (isinstance(max_length, float) and max_length != float("inf")):
-            raise ValueError(f"Parameter max_length should be an integer that is at least 3, but got {max_length} instead.")
+        _default_log_config = _LogConfig(logger, max_length)
+        
+    @classmethod
+    @_contextlib.contextmanager
+    def log_context(cls, logger: _logging.Logger, max_length: int | float | None =float("inf")) -> _Iterator[None]:
+        """
+        Log to `logger` within the current context only, e.g. a single thread or `asyncio` task.
+        
+        Parameters
+        ----------
+        logger: logging.Logger
+            The logger to use. It is used as is, without adding handlers or changing its level.
+        max_length: int | float | None, default=float("inf")
+            The max length of each part of a logging message. Must be at least 3.
+        """
         if max_length is None:
             max_length = float("inf")
-        cls._MAX_LENGTH = max_length
+        if max_length < 3 or (isinstance(max_length, float) and max_length != float("inf")):
+            raise ValueError(f"Parameter max_length should be an integer that is at least 3, but got {max_length} instead.")
+        
+        token = _log_config.set(_LogConfig(logger, max_length))
+        try:
+            yield
+        finally:
+            _log_config.reset(token)
+            
+    @classmethod
+    def get_logger(cls) -> _logging.Logger:
+        """Get the logger in effect for the current context."""
+        return _get_log_config().logger
         
 class PipeInput:
     """Pipes with inputs specified. Generally, avoid instantiating this class directly."""
     
-    def __init__(self, value) -> None:
-        """Create a `PipeInput` with a certain value."""
+    def __init__(self, value, owned: _Owned=False, stopped: bool=False) -> None:
+        """Create a `PipeInput` with a certain value, whether it is a copy owned by the pipe, and whether the remaining stages are skipped."""
         self.value = value
+        self.owned = owned
+        self.stopped = stopped
 
-    def pipe(self, func: _Callable[..., _Any], *, inplace: bool=False, loggable: bool=True) -> "PipeOutput":
+    def pipe(self, func: _Callable[..., _Any], *, inplace: "bool | str | _Callable[[_Any], _Any]"=False, loggable: bool=True) -> "PipeOutput":
         """
         Apply a function.
         
@@ -152,17 +1627,39 @@ class PipeInput:
         ----------
         func: Callable[..., Any]
             The function to be piped.
-        inplace: bool, default=False
-            Whether or not the function should return the original object.
+        inplace: bool | str | Callable[[Any], Any], default=False
+            Whether or not the function should return the original object. See `PipeOpening.pipe`.
         loggable: bool, default=True
             Whether or not the function should be loggable if logging is enabled.
             
         Notes
         -----
-        When `inplace`, the pipe returns the original object and not a copy. The function is applied first, then the object is returned.
+        When `inplace` is `True`, the pipe returns the original object and not a copy. The function is applied first, then the object is returned. With a copy strategy, the returned object is the copy the function was applied to.
         """
-        inplace_func = (lambda *args: self.value) if inplace else None
-        return PipeOutput(_lambdify(func, inplace_func=inplace_func, loggable=loggable), self.value)
+        return PipeOutput(func, self, inplace, loggable)
+    
+    def pipe_if(self, predicate: _Callable[[_Any], bool], func: _Callable[..., _Any], *, inplace: "bool | str | _Callable[[_Any], _Any]"=False, loggable: bool=True) -> "PipeOutput":
+        """
+        Apply a function only if the value satisfies a predicate. Otherwise, the value is passed on unchanged.
+        
+        Parameters
+        ----------
+        predicate: Callable[[Any], bool]
+            Whether to apply the function to the value.
+        func: Callable[..., Any]
+            The function to be piped.
+        inplace: bool | str | Callable[[Any], Any], default=False
+            Whether or not the function should return the original object. See `PipeOpening.pipe`.
+        loggable: bool, default=True
+            Whether or not the function should be loggable if logging is enabled.
+        """
+        return PipeOutput(func, self, inplace, loggable, predicate)
+    
+    def until(self, predicate: _Callable[[_Any], bool]) -> "PipeInput":
+        """Skip the remaining stages if the value satisfies a predicate."""
+        if self.stopped or not predicate(self.value):
+            return self
+        return PipeInput(self.value, self.owned, stopped=True)
     
     def pop(self) -> _Any:
         """Retrieve the resulting value."""
@@ -171,10 +1668,13 @@ class PipeInput:
 class PipeOutput:
     """Pipes where the inputs are applied to the functions. Generally, avoid using this class directly."""
     
-    def __init__(self, func: _Callable[..., _Any], input: _Any) -> None:
+    def __init__(self, func: _Callable[..., _Any], input: PipeInput, inplace: "bool | str | _Callable[[_Any], _Any]", loggable: bool, predicate: _Callable[[_Any], bool] | None=None) -> None:
         """Create a `PipeOutput` with on a certain function and its input."""
         self.func = func
         self.input = input
+        self.inplace = inplace
+        self.loggable = loggable
+        self.predicate = predicate
     
     def __call__(self, *args: _Any, **kwargs: _Any) -> "PipeInput":
         """
@@ -184,27 +1684,25 @@ class PipeOutput:
         -----
         THIS cannot be used within expressions, including starred expressions. However, it can be used to substitute a positional or keyword argument. If THIS is not explicitly given, it is assumed to be the first positional argument.
         """
-        args = list(args)
-        if THIS in args:
-            args[args.index(THIS)] = self.input
-        elif THIS in kwargs.values():
-            for var, value in kwargs.items():
-                if THIS == value:
-                    kwargs[var] = self.input
-                    break
-        else:
-            args.insert(0, self.input)
-        return PipeInput(self.func(*args, **kwargs))
+        if self.input.stopped:
+            return self.input
+        stage = _Stage(self.func, args, kwargs, self.inplace, self.loggable, self.predicate)
+        value, owned = stage.apply(self.input.value, self.input.owned)
+        if type(value) is _Exit:
+            return PipeInput(value.value, owned, stopped=True)
+        return PipeInput(value, owned)
     
 class PipeOpening:
     """Pipes without inputs specified. Generally, avoid instantiating this class directly."""
     
-    def __init__(self, name: str, func: _Callable[..., _Any]) -> None:
-        """Create a `PipeOpening` with a name and function."""
+    __slots__ = ('name', 'stages')
+    
+    def __init__(self, name: str, stages: tuple[_Any, ...]) -> None:
+        """Create a `PipeOpening` with a name and the stages so far, as piped."""
         self.name = name
-        self.func = func
+        self.stages = stages
         
-    def pipe(self, func: _Callable[..., _Any], *, inplace: bool=False, loggable: bool=True) -> "PipeJoiner":
+    def pipe(self, func: _Callable[..., _Any], *, inplace: "bool | str | _Callable[[_Any], _Any]"=False, loggable: bool=True) -> "PipeJoiner":
         """
         Apply a function.
         
@@ -212,33 +1710,88 @@ class PipeOpening:
         ----------
         func: Callable[..., Any]
             The function to be piped.
-        inplace: bool, default=False
-            Whether or not the function should return the original object.
+        inplace: bool | str | Callable[[Any], Any], default=False
+            Whether or not the function should return the original object. `True` applies the function to the object itself. `"shallow"`, `"deep"`, `"view"` or a custom copy function apply it to a copy instead, which is then returned.
         loggable: bool, default=True
             Whether or not the function should be loggable if logging is enabled.
             
         Notes
         -----
-        When `inplace`, the pipe returns the original object and not a copy. The function is applied first, then the object is returned.
+        When `inplace` is `True`, the pipe returns the original object and not a copy. The function is applied first, then the object is returned. With a copy strategy, the returned object is the copy the function was applied to.
+        
+        Copies are made lazily: only before a stage that may mutate the object, and once per value, since later stages may freely mutate a copy the pipe already owns. A stage copying deeper than the copy it is given, e.g. `"deep"` after `"shallow"`, copies it again. Functions marked with `Pipe.readonly` never trigger a copy. `"view"` uses `numpy.ndarray.view` and `pandas` `copy(deep=False)`, which share data with the original, and falls back to `"shallow"` for other types.
         """
-        return PipeJoiner(self.name, self.func, func, inplace, loggable)
+        return PipeJoiner(self.name, self.stages, func, inplace, loggable)
     
-    def close(self) -> _Callable[[_Any], _Any]:
-        """Get the resulting univariate function."""
-        self.func.__name__ = self.name
-        return self.func
+    def pipe_if(self, predicate: _Callable[[_Any], bool], func: _Callable[..., _Any], *, inplace: "bool | str | _Callable[[_Any], _Any]"=False, loggable: bool=True) -> "PipeJoiner":
+        """
+        Apply a function only if the value satisfies a predicate. Otherwise, the value is passed on unchanged.
+        
+        Parameters
+        ----------
+        predicate: Callable[[Any], bool]
+            Whether to apply the function to the value.
+        func: Callable[..., Any]
+            The function to be piped.
+        inplace: bool | str | Callable[[Any], Any], default=False
+            Whether or not the function should return the original object. See `PipeOpening.pipe`.
+        loggable: bool, default=True
+            Whether or not the function should be loggable if logging is enabled.
+        """
+        return PipeJoiner(self.name, self.stages, func, inplace, loggable, predicate)
+    
+    def until(self, predicate: _Callable[[_Any], bool]) -> "PipeOpening":
+        """Return the value immediately, skipping the remaining stages, if it satisfies a predicate. See also `Pipe.exit`."""
+        return PipeOpening(self.name, self.stages + (_Until(predicate),))
+    
+    def filter(self, predicate: _Callable[[_Any], bool]) -> "PipeOpening":
+        """
+        Drop the value, skipping the remaining stages, if it does not satisfy a predicate.
+        
+        Notes
+        -----
+        Dropped values are left out of the results of `PipeClosing.map`. Calling the closed pipe directly on a dropped value returns `None`.
+        """
+        return PipeOpening(self.name, self.stages + (_Filter(predicate),))
+    
+    def close(self, *, specialize: int | None=None, errors: "str | _Callable[[DeadLetter], _Any]"="raise") -> "PipeClosing":
+        """
+        Get the resulting univariate function.
+        
+        Parameters
+        ----------
+        specialize: int | None, default=None
+            After how many calls with inputs of the same type the pipe learns a fast path for that type. If `None`, it never does.
+        errors: str | Callable[[DeadLetter], Any], default="raise"
+            What `PipeClosing.map`, `PipeClosing.map_batch` and `PipeClosing.stream` do when the pipe raises an `Exception` on a value: `"raise"` it, `"skip"` the value, or call a sink with a `DeadLetter` naming the stage that failed, the input and the error, then skip the value.
+            
+        Notes
+        -----
+        A fast path records the type of the value entering each stage, and calls methods got with `THIS.method` directly from the type, without looking them up on each value. It skips the general handling of arguments where a stage has none to substitute. Whenever a value has a different type than recorded, the pipe falls back to the general path from that stage on, so results are the same either way. Methods are only resolved for immutable types whose instances have no `__dict__` to shadow them, e.g. most builtins, since a method of any other class could be reassigned after the fast path is learned.
+        
+        Calling the closed pipe directly always raises. With worker processes, failures are sent back to the current process, where the sink is called, so the error and input must be picklable but the sink need not be. Stages with a copying `inplace` strategy copy the input before changing it, so their dead letters hold the input as it was given, but stages with `inplace=True` change the input itself, so the dead letter holds it with any changes made before the failure.
+        """
+        if specialize is not None and specialize < 1:
+            raise ValueError(f"Parameter specialize should be at least 1, but got {specialize} instead.")
+        if errors not in ("raise", "skip") and not callable(errors):
+            raise ValueError(f"Parameter errors should be \"raise\", \"skip\" or a callable sink, but got {errors!r} instead.")
+        return PipeClosing(self.name, self.stages, specialize, errors)
     
 class PipeJoiner:
     """Pipes where the nonspecified inputs would be applied to the functions. Generally, avoid using this class directly."""
     
-    def __init__(self, name: str, prev_func: _Callable[..., _Any], func: _Callable[..., _Any], inplace: bool, loggable: bool) -> None:
-        """Create a `PipeJoiner` with a name between two functions."""
+    __slots__ = ('name', 'stages', 'func', 'inplace', 'loggable', 'predicate')
+    
+    def __init__(self, name: str, stages: tuple[_Any, ...], func: _Callable[..., _Any], inplace: "bool | str | _Callable[[_Any], _Any]", loggable: bool, predicate: _Callable[[_Any], bool] | None=None) -> None:
+        """Create a `PipeJoiner` with a name between the previous stages and a function."""
+        if inplace is not False:
+            _get_copier(inplace)
         self.name = name
-        self.prev_func = prev_func
+        self.stages = stages
         self.func = func
-        if loggable:
-            self.func = _add_logging(self.func, inplace)
         self.inplace = inplace
+        self.loggable = loggable
+        self.predicate = predicate
         
     def __call__(self, *args: _Any, **kwargs: _Any) -> "PipeOpening":
         """
@@ -248,20 +1801,355 @@ class PipeJoiner:
         -----
         THIS cannot be used within expressions, including starred expressions. However, it can be used to substitute a positional or keyword argument. If THIS is not explicitly given, it is assumed to be the first positional argument.
         """
-        args = list(args)
-        if THIS in args:
-            item = args.index(THIS)
-            args[item] = self.prev_func
-            f = lambda value: self.func(*args[:item], args[item](value), *args[item+1:], **kwargs)
-        elif THIS in kwargs.values():
-            for var, value in kwargs.items():
-                if THIS == value:
-                    item = var
+        spec = _StageSpec(self.func, args, kwargs, self.inplace, self.loggable, self.predicate)
+        return PipeOpening(self.name, self.stages + (spec,))
+    
+class PipeClosing:
+    """Closed pipes, i.e. univariate functions running each stage in turn. Generally, avoid instantiating this class directly.
+    
+    Closed pipes are immutable, and the only state they keep between calls is the fast paths learned with `specialize`, which never change results, so they may be shared and called from many threads at once. Stages are only compiled when the pipe is first used, so pipes defined but never run cost little more than their arguments.
+    """
+    
+    __slots__ = ('name', 'specs', 'specialize', 'errors', '_stages', '_specialization')
+    
+    def __init__(self, name: str, specs: tuple[_Any, ...], specialize: int | None=None, errors: "str | _Callable[[DeadLetter], _Any]"="raise") -> None:
+        """Create a `PipeClosing` with a name, its stages as piped, after how many calls it learns a fast path per input type, and its error policy."""
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'specs', specs)
+        object.__setattr__(self, '_stages', None)
+        object.__setattr__(self, 'specialize', specialize)
+        object.__setattr__(self, 'errors', errors)
+        object.__setattr__(self, '_specialization', None if specialize is None else _Specialization(specialize))
+        
+    def __setattr__(self, attr: str, value: _Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable, so {attr} cannot be set.")
+        
+    def __delattr__(self, attr: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable, so {attr} cannot be deleted.")
+        
+    def __reduce__(self) -> tuple[_Any, ...]:
+        # Failures in other processes are routed by the original pipe, so a sink is not sent along.
+        return (PipeClosing, (self.name, self.specs, self.specialize, "raise" if self.errors == "raise" else "skip"))
+        
+    @property
+    def __name__(self) -> str:
+        return self.name
+    
+    @property
+    def stages(self) -> tuple[_Any, ...]:
+        """The compiled stages, compiled on first use."""
+        stages = self._stages
+        if stages is None:
+            stages = tuple(map(_compile, self.specs))
+            object.__setattr__(self, '_stages', stages)
+        return stages
+        
+    def __repr__(self) -> str:
+        return f"<pyper3.PipeClosing {self.name} with {len(self.specs)} stages>"
+        
+    def __call__(self, value: _Any) -> _Any:
+        """Run the pipe on a value. If the value is dropped by `PipeOpening.filter`, `None` is returned."""
+        result = self._run(value)
+        return result.value if type(result) is _Exit else result
+    
+    def _run(self, value: _Any) -> _Any:
+        """Run the stages on a value, stopping early if one returns an `_Exit`."""
+        stages = self._stages
+        if stages is None:
+            stages = self.stages
+        if self._specialization is not None:
+            return self._specialization.run(stages, value)
+        return _run_stages(stages, value, False, 0)
+    
+    def _run_isolated(self, value: _Any) -> _Any:
+        """Run the stages on a value, returning a `_Failed` instead of raising unless the pipe raises errors."""
+        if self.errors == "raise":
+            return self._run(value)
+        try:
+            return self._run(value)
+        except Exception as error:
+            return _Failed(_dead_letter(self, value, error))
+    
+    def _route(self, letter: DeadLetter) -> None:
+        """Send a dead letter to the sink of the pipe, if it has one."""
+        if self.errors != "skip":
+            self.errors(letter)
+        
+    def stream(self, source: "str | _os.PathLike[str] | _Iterable[_Any]", checkpoint: "str | _os.PathLike[str]", *, every: int=1000, aggregate: _Callable[[_Iterable[_Any]], _Iterator[_Any]] | None=None, encoding: str="utf-8") -> _Iterator[_Any]:
+        """
+        Lazily run the pipe on each item of a stream, checkpointing progress so that a restarted stream resumes where it left off.
+        
+        Parameters
+        ----------
+        source: str | os.PathLike[str] | Iterable[Any]
+            A file to stream the lines of, or an iterable yielding the same items each time it is iterated over.
+        checkpoint: str | os.PathLike[str]
+            The file to keep the checkpoint in.
+        every: int, default=1000
+            The number of items between checkpoints. Checkpointing more often costs more, but leaves less to rerun after a crash.
+        aggregate: Callable[[Iterable[Any]], Iterator[Any]] | None, default=None
+            A function from `Pipe.tumbling`, `Pipe.sliding` or `Pipe.running` aggregating the results. Its state is checkpointed too.
+        encoding: str, default="utf-8"
+            The encoding of `source`, if it is a file.
+            
+        Notes
+        -----
+        A checkpoint holds the offset in `source` after the last item whose results were all consumed, i.e. a byte offset for files and a count otherwise, and the state of `aggregate`. It is replaced atomically, so a crash never leaves a partial checkpoint. It also records the path of a file `source`, or the type of an iterable one, and the kind, size and step of `aggregate` with the names of its aggregator, key, value and time functions, and resuming with different ones, or with a source shorter than the offset, raises a `ValueError`. On restart, the stream resumes from the checkpoint, so results yielded after it are yielded again: each result is yielded at least once. Keys and aggregators of `aggregate` must be picklable. Once `source` is exhausted, the checkpoint is deleted. Failures are routed by the error policy of the pipe as their item is read, so they are routed again if the stream restarts before the next checkpoint.
+        """
+        if every < 1:
+            raise ValueError(f"Parameter every should be at least 1, but got {every} instead.")
+        if aggregate is not None and not isinstance(aggregate, (_Window, _Running)):
+            raise ValueError(f"Parameter aggregate should come from Pipe.tumbling, Pipe.sliding or Pipe.running, but got {aggregate!r} instead.")
+        state = None if aggregate is None else aggregate.start()
+        described = {'source': _describe_source(source), 'aggregate': _describe_aggregate(aggregate)}
+        offset = 0
+        saved = _load_checkpoint(checkpoint)
+        if saved is not None:
+            if {key: saved.get(key) for key in described} != described:
+                raise ValueError(f"Checkpoint {checkpoint} was written for source {saved.get('source')} and aggregate {saved.get('aggregate')}, but got {described['source']} and {described['aggregate']} instead. Delete it to start over.")
+            offset = saved['offset']
+            length = _os.path.getsize(source) if described['source'][0] == 'file' else len(source) if isinstance(source, _Sized) else None
+            if length is not None and length < offset:
+                raise ValueError(f"Checkpoint {checkpoint} resumes at offset {offset}, but source {described['source'][1]} only has {length}. Delete it to start over.")
+            if aggregate is not None:
+                state = saved['state']
+                state.spec = aggregate
+        since = 0
+        for item, offset in _read_source(source, offset, encoding):
+            for result in _kept(_finish(self._run_isolated(item)), self):
+                if state is None:
+                    yield result
+                else:
+                    yield from state.feed(result)
+            since += 1
+            if since >= every:
+                _save_checkpoint(checkpoint, {'offset': offset, 'state': state, **described})
+                since = 0
+        if state is not None:
+            yield from state.flush()
+        if _os.path.exists(checkpoint):
+            _os.unlink(checkpoint)
+    
+    def run_budgeted(self, value: _Any, memory_budget: int, *, spill_directory: str | None=None) -> BudgetedRun:
+        """
+        Run the pipe on a value, tracking the memory used by each stage and moving results over budget to disk.
+        
+        Parameters
+        ----------
+        value: Any
+            The value to run the pipe on.
+        memory_budget: int
+            Size in bytes above which the result of a stage is moved to disk before the next stage.
+        spill_directory: str | None, default=None
+            Where to write values moved to disk. If `None`, the default temporary directory.
+            
+        Notes
+        -----
+        Each stage reports the peak memory traced by `tracemalloc` while it ran, above what was allocated before it, and the estimated size of its result. Tracing slows the pipe down, and it covers the whole process, so concurrent work is counted too.
+        
+        Only NumPy arrays can be moved to disk between two stages, as memory maps paged in as the next stage reads them. Other results are needed in memory by the next stage anyway, so they are reported but not moved. Each intermediate result is released as soon as the next stage returns.
+        """
+        if memory_budget < 1:
+            raise ValueError(f"Parameter memory_budget should be at least 1, but got {memory_budget} instead.")
+        stages = []
+        tracing = _tracemalloc.is_tracing()
+        if not tracing:
+            _tracemalloc.start()
+        try:
+            owned = False
+            for stage in self.stages:
+                before = _tracemalloc.get_traced_memory()[0]
+                _tracemalloc.reset_peak()
+                value, owned = stage.apply(value, owned)
+                peak = _tracemalloc.get_traced_memory()[1] - before
+                if type(value) is _Exit:
+                    stages.append(StageMemory(_stage_name(stage), peak, 0, False))
+                    value = value.value
                     break
-            f = lambda value: self.func(*args, **(kwargs | {item:self.prev_func(value)}))
-        else:
-            f = lambda value: self.func(self.prev_func(value), *args, **kwargs)
+                size = _sizeof(value)
+                spilled = size > memory_budget and _is_array(value)
+                if spilled:
+                    value, owned = _spill(value, spill_directory), True
+                stages.append(StageMemory(_stage_name(stage), peak, size, spilled))
+        finally:
+            if not tracing:
+                _tracemalloc.stop()
+        return BudgetedRun(value, stages)
+    
+    def map_batch(self, values: _Any) -> _Any:
+        """
+        Run the pipe on each row of a batch at once, returning a column of the results.
+        
+        Parameters
+        ----------
+        values: Batch | Iterable[Any]
+            A `Batch`, records to create one from with `Batch.from_records` if they are mappings, or else the values of a column.
             
-        inplace_func = (lambda value: self.prev_func(value)) if self.inplace else None
-
-        return PipeOpening(self.name, _lambdify(f, inplace_func=inplace_func, loggable=False))
\ No newline at end of file
+        Notes
+        -----
+        The results are the same as those of `PipeClosing.map`, but stages see whole columns. `THIS[name]` and `THIS.name` select a column from a batch, so `THIS.name` works on records given as mappings here, whereas `map` raises `AttributeError` on them, and functions marked with `Pipe.vectorized`, e.g. NumPy ufuncs with one output and `operator.add`, are called once on NumPy columns. Other functions are applied to each element, or to each row of a batch, in a loop without going through the remaining pipe machinery. Results that are all `int` or all `float` are stored as NumPy arrays if NumPy is installed, or else as `array.array`, and other results as lists.
+        
+        A function called once on a whole column is called again on each element if it fails, or if NumPy reports a division by zero, an overflow or an invalid value, so that those elements raise as with `map`. Unless the pipe raises errors, rows failing are then left out of the results and routed by its error policy. Integer arithmetic on NumPy columns still wraps around past 64 bits, where `map` would return a larger `int`.
+        """
+        if not isinstance(values, Batch):
+            numpy = _numpy()
+            if not isinstance(values, _array.array) and not (numpy is not None and isinstance(values, numpy.ndarray)):
+                values = list(values)
+                values = Batch.from_records(values) if values and all(isinstance(value, _Mapping) for value in values) else _column(values)
+        rows: list[int] = list(range(len(values)))
+        done: dict[int, _Any] = {}
+        isolated = self.errors != "raise"
+        inputs = _elements(values) if isolated else None
+        for position, stage in enumerate(self.stages):
+            if not rows:
+                break
+            column = _select(stage, values)
+            if column is not None:
+                values = column
+                continue
+            numpy = _numpy()
+            if type(stage) is _Stage and stage.predicate is None and not stage.inplace and numpy is not None and isinstance(values, numpy.ndarray) and _is_vectorized(stage.func):
+                try:
+                    with numpy.errstate(divide="raise", over="raise", invalid="raise"):
+                        values = stage(values)
+                    continue
+                except Exception:
+                    pass # Run the stage on each element instead, to raise or route errors as `map` would, e.g. `ZeroDivisionError`.
+            if isolated:
+                results = []
+                for index, element in enumerate(_elements(values)):
+                    try:
+                        results.append(stage.apply(element, False)[0])
+                    except Exception as error:
+                        self._route(DeadLetter(self.name, _stage_name(stage), position, inputs[rows[index]], error))
+                        results.append(_Exit(None, dropped=True))
+            else:
+                results = [stage.apply(element, False)[0] for element in _elements(values)]
+            kept = [index for index, result in enumerate(results) if type(result) is not _Exit]
+            if len(kept) < len(results):
+                for index, result in enumerate(results):
+                    if type(result) is _Exit and not result.dropped:
+                        done[rows[index]] = result.value
+                rows = [rows[index] for index in kept]
+                results = [results[index] for index in kept]
+            values = _column(results)
+        if not done:
+            return values
+        done.update(zip(rows, _elements(values)))
+        return _column([done[row] for row in sorted(done)])
+    
+    def map(self, values: _Iterable[_Any], *, processes: int | None=None, shared_memory_threshold: int | None=1 << 20, workers: _Sequence[_Address] | None=None, authkey: bytes | None=None, batch_size: int=64, retries: int=2) -> _Iterator[_Any]:
+        """
+        Lazily run the pipe on each value, optionally in parallel worker processes.
+        
+        Parameters
+        ----------
+        values: Iterable[Any]
+            The values to run the pipe on.
+        processes: int | None, default=None
+            The number of worker processes. If `None`, the pipe is run in the current process.
+        shared_memory_threshold: int | None, default=1 << 20
+            Minimum size in bytes of `bytes`, `bytearray`, `memoryview` and `numpy.ndarray` inputs and outputs sent between processes through `multiprocessing.shared_memory` instead of being pickled. If `None`, everything is pickled.
+        workers: Sequence[str | tuple[str, int]] | None, default=None
+            Addresses of workers started by `Pipe.start_workers` or `Pipe.serve` to run the pipe on instead of local processes.
+        authkey: bytes | None, default=None
+            Key authenticating with `workers`. If `None`, the key of the current process is used.
+        batch_size: int, default=64
+            The number of values sent to `workers` at once.
+        retries: int, default=2
+            How many times a batch is retried on the next worker when a connection to `workers` fails.
+            
+        Notes
+        -----
+        The pipe is sent to each worker once, so its stages must be picklable. Workers receive zero-copy views of shared inputs: a read-only `memoryview` for `bytes`, a writable `memoryview` for `bytearray`, a writable `memoryview` of the same format and shape for `memoryview`, and an array backed by the segment for `numpy.ndarray`. Large results come back through shared memory too, with `memoryview` results returned as `bytes`. Results are yielded in order, and segments are destroyed as soon as they are no longer needed.
+        
+        With `workers`, the pipe is sent once per connection, and connections are kept open to be reused by later calls. Batches are spread over the workers, and errors raised by the pipe are raised when their result is reached, or handled by the error policy given to `PipeOpening.close`.
+        """
+        import multiprocessing as _multiprocessing
+        if workers is not None:
+            if processes is not None:
+                raise ValueError("Parameters processes and workers cannot both be given.")
+            if len(workers) < 1 or batch_size < 1 or retries < 0:
+                raise ValueError(f"Parameters workers and batch_size should be nonempty and at least 1, and retries at least 0, but got {workers}, {batch_size} and {retries} instead.")
+            if authkey is None:
+                authkey = _multiprocessing.current_process().authkey
+            return self._map_workers(values, workers, authkey, batch_size, retries)
+        if processes is None:
+            if self.errors == "raise":
+                return (_finish(result) for result in map(self._run, values) if type(result) is not _Exit or not result.dropped)
+            return (kept for result in map(self._run_isolated, values) for kept in _kept(_finish(result), self))
+        if processes < 1:
+            raise ValueError(f"Parameter processes should be at least 1, but got {processes} instead.")
+        if shared_memory_threshold is not None and shared_memory_threshold < 1:
+            raise ValueError(f"Parameter shared_memory_threshold should be at least 1, but got {shared_memory_threshold} instead.")
+        return self._map_processes(values, processes, shared_memory_threshold)
+        
+    def _map_processes(self, values: _Iterable[_Any], processes: int, threshold: int | None) -> _Iterator[_Any]:
+        """Run the pipe in worker processes, keeping a bounded number of inputs in flight."""
+        from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+        pending: "_deque[tuple[_Future, _Any]]" = _deque()
+        with _ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(self,)) as executor:
+            try:
+                for value in values:
+                    handle = _share(value, threshold)
+                    try:
+                        pending.append((executor.submit(_run_worker, handle, threshold), handle))
+                    except BaseException:
+                        _discard(handle)
+                        raise
+                    if len(pending) >= 2 * processes:
+                        yield from _kept(_collect(*pending.popleft()), self)
+                while pending:
+                    yield from _kept(_collect(*pending.popleft()), self)
+            finally:
+                while pending:
+                    future, handle = pending.popleft()
+                    future.cancel()
+                    if not future.cancelled() and future.exception() is None:
+                        _discard(future.result())
+                    _discard(handle)
+                    
+    def _map_workers(self, values: _Iterable[_Any], workers: _Sequence[_Address], authkey: bytes, batch_size: int, retries: int) -> _Iterator[_Any]:
+        """Run the pipe on remote workers, keeping a bounded number of batches in flight."""
+        import hashlib as _hashlib
+        from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+        spec = _pickle.dumps(self, _pickle.HIGHEST_PROTOCOL)
+        key = _hashlib.sha256(spec).hexdigest()
+        values = iter(values)
+        pending: "_deque[_Future]" = _deque()
+        executor = _ThreadPoolExecutor(len(workers))
+        try:
+            for start in _itertools.count():
+                batch = list(_itertools.islice(values, batch_size))
+                if not batch:
+                    break
+                pending.append(executor.submit(_run_remote, workers, start, authkey, retries, key, spec, batch))
+                if len(pending) >= 2 * len(workers):
+                    yield from _unbatch(pending.popleft().result(), self)
+            while pending:
+                yield from _unbatch(pending.popleft().result(), self)
+        finally:
+            executor.shutdown(cancel_futures=True)
+    
+class PipeWorkers:
+    """Local worker processes started by `Pipe.start_workers`. Generally, avoid instantiating this class directly."""
+    
+    def __init__(self, processes: "list[_multiprocessing.Process]", addresses: list[_Address]) -> None:
+        """Create `PipeWorkers` from the worker processes and their addresses."""
+        self.processes = processes
+        self.addresses = addresses
+        
+    def __enter__(self) -> "PipeWorkers":
+        return self
+    
+    def __exit__(self, *exc_info: _Any) -> None:
+        self.stop()
+        
+    def stop(self) -> None:
+        """Stop the workers and close connections to them."""
+        for process, address in zip(self.processes, self.addresses):
+            process.terminate()
+            process.join()
+            _drop_connections(address)
+            if isinstance(address, str) and _os.path.exists(address):
+                _os.unlink(address)
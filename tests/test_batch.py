@@ -0,0 +1,122 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import array
+from operator import add, mul, truediv
+
+import pytest
+
+records = [{"name": "a", "price": 2, "count": 3}, {"name": "b", "price": 5, "count": 1}, {"name": "c", "price": 1, "count": 4}]
+
+class Record:
+    def __init__(self, value):
+        self.value = value
+
+def test_batch_columns():
+    
+    batch = pyper3.Batch.from_records(records)
+    
+    assert len(batch) == 3
+    assert list(batch["price"]) == [2, 5, 1]
+    assert batch["name"] == ["a", "b", "c"]
+    assert batch.rows()[1] == records[1]
+    
+def test_batch_lengths():
+    
+    try:
+        pyper3.Batch({"a": [1, 2], "b": [1]})
+        assert False
+    except ValueError:
+        assert True
+
+def test_select_item():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS["price"])().pipe(mul)(10).close()
+    
+    assert list(closed_pipe.map_batch(records)) == list(closed_pipe.map(records)) == [20, 50, 10]
+    
+def test_select_attribute():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.value)().pipe(add)(0.5).close()
+    batch = pyper3.Batch.from_records([Record(1), Record(2)], columns=["value"])
+    
+    assert list(closed_pipe.map_batch(batch)) == [1.5, 2.5]
+    
+def test_rows():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(lambda row: row["price"] * row.count)().close()
+    
+    assert list(closed_pipe.map_batch(records)) == [6, 5, 4]
+    
+def test_fallback_columns():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS["name"])().pipe(str.upper)().close()
+    
+    assert closed_pipe.map_batch(records) == ["A", "B", "C"]
+    
+def test_array_fallback(monkeypatch):
+    
+    monkeypatch.setattr(pyper3, "_numpy", lambda: None)
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS["price"])().pipe(mul)(2).close()
+    result = closed_pipe.map_batch(records)
+    
+    assert isinstance(result, array.array)
+    assert list(result) == [4, 10, 2]
+    
+def test_filter_until():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.THIS["price"])()
+        .filter(lambda price: price > 1)
+        .until(lambda price: price > 4)
+        .pipe(mul)(100)
+        .close()
+    )
+    
+    assert list(closed_pipe.map_batch(records)) == list(closed_pipe.map(records)) == [200, 5]
+    
+def test_numpy():
+    
+    numpy = pytest.importorskip("numpy")
+    calls = []
+    
+    @pyper3.Pipe.vectorized
+    def double(column):
+        calls.append(column)
+        return column * 2
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS["price"])().pipe(double)().pipe(numpy.sqrt)().close()
+    result = closed_pipe.map_batch(records)
+    
+    assert isinstance(result, numpy.ndarray)
+    assert len(calls) == 1
+    assert list(result) == list(closed_pipe.map(records))
+    
+def test_mixed_numbers_keep_types():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(str)().close()
+    
+    assert list(closed_pipe.map_batch([1, 2.5, True])) == list(closed_pipe.map([1, 2.5, True])) == ["1", "2.5", "True"]
+    
+def test_numpy_division_by_zero():
+    
+    pytest.importorskip("numpy")
+    closed_pipe = pyper3.Pipe.open().pipe(truediv)(1, pyper3.THIS).close()
+    
+    assert closed_pipe.map_batch([1, 2, 4]).tolist() == [1.0, 0.5, 0.25]
+    try:
+        closed_pipe.map_batch([1, 0, 4])
+        assert False
+    except ZeroDivisionError:
+        assert True
+        
+def test_numpy_several_outputs():
+    
+    numpy = pytest.importorskip("numpy")
+    closed_pipe = pyper3.Pipe.open().pipe(numpy.divmod)(pyper3.THIS, 3).close()
+    
+    assert list(closed_pipe.map_batch([4, 7, 9])) == list(closed_pipe.map([4, 7, 9])) == [(1, 1), (2, 1), (3, 0)]
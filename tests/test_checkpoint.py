@@ -0,0 +1,126 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import os
+import pickle
+
+class Crash(Exception):
+    pass
+
+def crash_at(values, count):
+    for index, value in enumerate(values):
+        if index == count:
+            raise Crash()
+        yield value
+
+def test_file_resume(tmp_path):
+    
+    source = tmp_path / "events.txt"
+    source.write_text("".join(f"{i}\n" for i in range(10)))
+    checkpoint = tmp_path / "events.checkpoint"
+    closed_pipe = pyper3.Pipe.open().pipe(int)().close()
+    
+    try:
+        list(crash_at(closed_pipe.stream(source, checkpoint, every=3), 7))
+        assert False
+    except Crash:
+        assert True
+    
+    with open(checkpoint, "rb") as file:
+        assert pickle.load(file)["offset"] == len("0\n1\n2\n3\n4\n5\n")
+    
+    assert list(closed_pipe.stream(source, checkpoint, every=3)) == [6, 7, 8, 9]
+    assert not os.path.exists(checkpoint)
+    
+def test_iterable_resume(tmp_path):
+    
+    checkpoint = tmp_path / "items.checkpoint"
+    closed_pipe = pyper3.Pipe.open().filter(lambda value: value % 2 == 0).close()
+    
+    try:
+        list(crash_at(closed_pipe.stream(range(20), checkpoint, every=4), 3))
+        assert False
+    except Crash:
+        assert True
+        
+    assert list(closed_pipe.stream(range(20), checkpoint, every=4)) == [4, 6, 8, 10, 12, 14, 16, 18]
+    
+def test_aggregate_resume(tmp_path):
+    
+    checkpoint = tmp_path / "sums.checkpoint"
+    closed_pipe = pyper3.Pipe.open().close()
+    windows = pyper3.Pipe.tumbling(4, pyper3.Sum, key=lambda value: value % 2)
+    expected = list(windows(range(16)))
+    
+    results = []
+    try:
+        for result in closed_pipe.stream(range(16), checkpoint, every=3, aggregate=windows):
+            results.append(result)
+            if len(results) == 3:
+                raise Crash()
+    except Crash:
+        pass
+    
+    results.extend(closed_pipe.stream(range(16), checkpoint, every=3, aggregate=windows))
+    
+    assert results == expected[:3] + expected[2:]
+    
+def test_atomic_checkpoint(tmp_path):
+    
+    checkpoint = tmp_path / "items.checkpoint"
+    closed_pipe = pyper3.Pipe.open().close()
+    
+    stream = closed_pipe.stream(range(10), checkpoint, every=1)
+    next(stream)
+    next(stream)
+    
+    assert os.listdir(tmp_path) == ["items.checkpoint"]
+    
+def test_mismatched_checkpoint(tmp_path):
+    
+    source = tmp_path / "events.txt"
+    source.write_text("".join(f"{i}\n" for i in range(10)))
+    other = tmp_path / "other.txt"
+    other.write_text("".join(f"{i}\n" for i in range(10)))
+    checkpoint = tmp_path / "events.checkpoint"
+    closed_pipe = pyper3.Pipe.open().pipe(int)().close()
+    
+    try:
+        list(crash_at(closed_pipe.stream(source, checkpoint, every=3), 7))
+        assert False
+    except Crash:
+        assert True
+        
+    for kwargs in ({"source": other}, {"source": range(10)}, {"source": source, "aggregate": pyper3.Pipe.running(pyper3.Sum)}):
+        try:
+            list(closed_pipe.stream(checkpoint=checkpoint, every=3, **kwargs))
+            assert False
+        except ValueError:
+            assert True
+            
+    source.write_text("0\n")
+    try:
+        list(closed_pipe.stream(source, checkpoint, every=3))
+        assert False
+    except ValueError:
+        assert True
+        
+    source.write_text("".join(f"{i}\n" for i in range(20)))
+    checkpoint = tmp_path / "windows.checkpoint"
+    
+    try:
+        list(crash_at(closed_pipe.stream(source, checkpoint, every=3, aggregate=pyper3.Pipe.tumbling(5, pyper3.Sum)), 2))
+        assert False
+    except Crash:
+        assert True
+        
+    for aggregate in (pyper3.Pipe.tumbling(5, pyper3.Mean), pyper3.Pipe.tumbling(5, pyper3.Sum, value=abs)):
+        try:
+            list(closed_pipe.stream(source, checkpoint, every=3, aggregate=aggregate))
+            assert False
+        except ValueError:
+            assert True
+            
+    assert [result.value for result in closed_pipe.stream(source, checkpoint, every=3, aggregate=pyper3.Pipe.tumbling(5, pyper3.Sum))] == [60, 85]
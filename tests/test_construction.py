@@ -0,0 +1,74 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import os
+import pickle
+import subprocess
+from operator import add, mul
+    
+class Incomparable:
+    
+    def __eq__(self, other):
+        raise TypeError("cannot compare")
+    
+    __hash__ = object.__hash__
+    
+def pair(left, right):
+    return (left, right)
+    
+def test_lazy_compilation():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).pipe(mul)(2).close()
+    assert closed_pipe._stages is None
+    
+    assert closed_pipe(1) == 4
+    assert len(closed_pipe._stages) == 2
+    
+def test_interned_stages():
+    
+    p1 = pyper3.Pipe.open().pipe(add)(1).pipe(pyper3.THIS.real)().close()
+    p2 = pyper3.Pipe.open().pipe(add)(1).pipe(pyper3.THIS.real)().close()
+    p3 = pyper3.Pipe.open().pipe(add)(2).close()
+    
+    assert p1.stages[0] is p2.stages[0]
+    assert p1.stages[1] is p2.stages[1]
+    assert p1.stages[0] is not p3.stages[0]
+    
+def test_equal_arguments_not_interned():
+    
+    p1 = pyper3.Pipe.open().pipe(mul)(1).close()
+    p2 = pyper3.Pipe.open().pipe(mul)(1.0).close()
+    
+    assert type(p1(2)) is int
+    assert type(p2(2)) is float
+    
+def test_this_found_by_identity():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pair)(Incomparable(), pyper3.THIS).close()
+    
+    assert closed_pipe(1)[1] == 1
+    
+def test_pickled_this():
+    
+    closed_pipe = pickle.loads(pickle.dumps(pyper3.Pipe.open().pipe(pair)(0, pyper3.THIS).close()))
+    
+    assert closed_pipe(1) == (0, 1)
+    
+def test_invalid_inplace():
+    
+    try:
+        pyper3.Pipe.open().pipe(add, inplace="nothing")
+    except ValueError:
+        pass
+    else:
+        assert False
+    
+def test_cheap_import():
+    
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, pyper3; print(sorted({'multiprocessing', 'concurrent.futures', 'tempfile', 'hashlib'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    
+    assert result.stdout.strip() == "[]"
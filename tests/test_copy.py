@@ -0,0 +1,179 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import copy
+from collections import defaultdict
+
+def test_open_shallow():
+    
+    arr = [2, 3, 1]
+
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.THIS.sort, inplace="shallow")()
+        .close()
+    )(arr)
+    
+    assert b == [1, 2, 3]
+    assert arr == [2, 3, 1]
+    
+def test_push_shallow():
+    
+    arr = [2, 3, 1]
+
+    b = (
+        pyper3.Pipe
+        .push(arr)
+        .pipe(pyper3.THIS.append, inplace="shallow")(4)
+        .pop()
+    )
+    
+    assert b == [2, 3, 1, 4]
+    assert arr == [2, 3, 1]
+    
+def test_deep():
+    
+    nested = {"a": [1, 2]}
+
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(lambda d: d["a"].append(3), inplace="deep")()
+        .close()
+    )(nested)
+    
+    assert b == {"a": [1, 2, 3]}
+    assert nested == {"a": [1, 2]}
+    
+def test_view_fallback():
+    
+    arr = [2, 3, 1]
+
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.THIS.reverse, inplace="view")()
+        .close()
+    )(arr)
+    
+    assert b == [1, 3, 2]
+    assert arr == [2, 3, 1]
+    
+def test_copy_once():
+    
+    copies = []
+    def copier(value):
+        copies.append(value)
+        return copy.copy(value)
+    
+    arr = [2, 3, 1]
+
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.THIS.append, inplace=copier)(4)
+        .pipe(pyper3.THIS.sort, inplace=copier)()
+        .close()
+    )(arr)
+    
+    assert b == [1, 2, 3, 4]
+    assert arr == [2, 3, 1]
+    assert len(copies) == 1
+    
+def test_readonly_skips_copy():
+    
+    copies = []
+    def copier(value):
+        copies.append(value)
+        return copy.copy(value)
+    
+    @pyper3.Pipe.readonly
+    def peek(value):
+        pass
+    
+    arr = [2, 3, 1]
+
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(print, inplace=copier)()
+        .pipe(peek, inplace=copier)()
+        .close()
+    )(arr)
+    
+    assert b is arr
+    assert copies == []
+    
+def test_join_shallow():
+    
+    arr = [2, 3, 1]
+    
+    pipeline = pyper3.Pipe.join(pyper3.THIS.sort, inplace="shallow")
+    b = pipeline(arr)
+    
+    assert b == [1, 2, 3]
+    assert arr == [2, 3, 1]
+    
+def test_invalid_strategy():
+    
+    try:
+        pyper3.Pipe.open().pipe(print, inplace="nonexistent")()
+        assert False
+    except ValueError:
+        assert True
+    
+def test_deeper_copy_after_shallow():
+    
+    def mutate_inner(value):
+        value[0].append(99)
+    
+    nested = [[1], [2]]
+    
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.THIS.append, inplace="shallow")([3])
+        .pipe(mutate_inner, inplace="deep")()
+        .pipe(pyper3.THIS.pop, inplace="shallow")()
+        .close()
+    )(nested)
+    
+    assert b == [[1, 99], [2]]
+    assert nested == [[1], [2]]
+    
+def test_custom_copy_before_deep():
+    
+    copies = []
+    def copier(value):
+        copies.append(value)
+        return copy.copy(value)
+    
+    def mutate_inner(value):
+        value[0].append(99)
+    
+    nested = [[1]]
+    
+    b = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.THIS.append, inplace=copier)([2])
+        .pipe(mutate_inner, inplace="deep")()
+        .pipe(pyper3.THIS.pop, inplace=copier)()
+        .close()
+    )(nested)
+    
+    assert b == [[1, 99]]
+    assert nested == [[1]]
+    assert len(copies) == 1
+    
+def test_item_copied():
+    
+    counts = defaultdict(int)
+    
+    result = pyper3.Pipe.open().pipe(pyper3.THIS["k"], inplace="shallow")().close()(counts)
+    
+    assert result == {"k": 0}
+    assert "k" not in counts
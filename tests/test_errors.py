@@ -0,0 +1,121 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import math
+import pytest
+from operator import add, neg, truediv
+    
+def reciprocal(value):
+    return 1 / value
+    
+def reciprocal_pipe(errors):
+    return pyper3.Pipe.open("reciprocal").pipe(add)(0).pipe(truediv)(1, pyper3.THIS).close(errors=errors)
+    
+def test_raise():
+    
+    closed_pipe = reciprocal_pipe("raise")
+    
+    try:
+        list(closed_pipe.map([1, 0, 2]))
+    except ZeroDivisionError:
+        pass
+    else:
+        assert False
+    
+def test_skip():
+    
+    closed_pipe = reciprocal_pipe("skip")
+    
+    assert list(closed_pipe.map([1, 0, 2])) == [1.0, 0.5]
+    
+    try:
+        closed_pipe(0)
+    except ZeroDivisionError:
+        pass
+    else:
+        assert False
+    
+def test_dead_letters():
+    
+    letters = []
+    closed_pipe = reciprocal_pipe(letters.append)
+    
+    assert list(closed_pipe.map([1, 0, 2, 0])) == [1.0, 0.5]
+    assert [letter.input for letter in letters] == [0, 0]
+    letter = letters[0]
+    assert (letter.pipe, letter.stage, letter.index) == ("reciprocal", "truediv", 1)
+    assert isinstance(letter.error, ZeroDivisionError)
+    
+def test_repeated_stage_dead_letters():
+    
+    for specialize in [None, 1]:
+        letters = []
+        closed_pipe = pyper3.Pipe.open().pipe(math.sqrt)().pipe(neg)().pipe(math.sqrt)().close(specialize=specialize, errors=letters.append)
+        
+        assert list(closed_pipe.map([4, 9, 16])) == []
+        assert [(letter.stage, letter.index, letter.input) for letter in letters] == [("sqrt", 2, 4), ("sqrt", 2, 9), ("sqrt", 2, 16)]
+        
+def test_specialized_dead_letters():
+    
+    letters = []
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.upper)().pipe(int)().close(specialize=1, errors=letters.append)
+    
+    assert list(closed_pipe.map(["1", "a", "2", "b"])) == [1, 2]
+    assert [(letter.stage, letter.input) for letter in letters] == [("int", "a"), ("int", "b")]
+    
+def test_invalid_errors():
+    
+    try:
+        pyper3.Pipe.open().pipe(add)(1).close(errors="ignore")
+    except ValueError:
+        pass
+    else:
+        assert False
+    
+def test_process_dead_letters():
+    
+    letters = []
+    closed_pipe = reciprocal_pipe(letters.append)
+    
+    assert list(closed_pipe.map([1, 0, 2, 0, 4], processes=2)) == [1.0, 0.5, 0.25]
+    assert [(letter.stage, letter.input) for letter in letters] == [("truediv", 0), ("truediv", 0)]
+    
+def test_worker_dead_letters():
+    
+    letters = []
+    closed_pipe = reciprocal_pipe(letters.append)
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        assert list(closed_pipe.map([1, 0, 2, 0, 4], workers=workers.addresses, batch_size=2)) == [1.0, 0.5, 0.25]
+    
+    assert [letter.input for letter in letters] == [0, 0]
+    
+def test_batch_dead_letters():
+    
+    letters = []
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS["x"])().pipe(reciprocal)().close(errors=letters.append)
+    
+    assert list(closed_pipe.map_batch([{"x": 1}, {"x": 0}, {"x": 2}])) == [1.0, 0.5]
+    assert [(letter.stage, letter.index, dict(letter.input)) for letter in letters] == [("reciprocal", 1, {"x": 0})]
+    
+def test_vectorized_dead_letters():
+    
+    numpy = pytest.importorskip("numpy")
+    letters = []
+    closed_pipe = pyper3.Pipe.open().pipe(truediv)(1, pyper3.THIS).close(errors=letters.append)
+    
+    with numpy.errstate(divide="raise"):
+        result = closed_pipe.map_batch([1, 0, 4])
+        
+    assert result.tolist() == [1.0, 0.25]
+    assert [(letter.input, type(letter.error)) for letter in letters] == [(0, ZeroDivisionError)]
+    
+def test_stream_dead_letters(tmp_path):
+    
+    letters = []
+    closed_pipe = reciprocal_pipe(letters.append)
+    
+    assert list(closed_pipe.stream([1, 0, 2], tmp_path / "checkpoint", every=1)) == [1.0, 0.5]
+    assert [letter.input for letter in letters] == [0]
@@ -0,0 +1,74 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import os
+
+import pytest
+
+def build(count):
+    return list(range(count))
+
+def test_run_budgeted():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(build)().pipe(len)().close()
+    run = closed_pipe.run_budgeted(100_000, memory_budget=1 << 30)
+    
+    assert run.value == 100_000
+    assert [stage.name for stage in run.stages] == ["build", "len"]
+    assert run.stages[0].peak >= run.stages[0].size > 100_000 * 8
+    assert not any(stage.spilled for stage in run.stages)
+    
+def test_run_budgeted_exit():
+    
+    closed_pipe = pyper3.Pipe.open().until(lambda value: value > 5).pipe(build)().close()
+    run = closed_pipe.run_budgeted(10, memory_budget=1)
+    
+    assert run.value == 10
+    assert [stage.name for stage in run.stages] == ["<pyper3.until>"]
+    
+def test_spill_array(tmp_path):
+    
+    numpy = pytest.importorskip("numpy")
+    closed_pipe = pyper3.Pipe.open().pipe(numpy.arange)().pipe(numpy.sum)().close()
+    run = closed_pipe.run_budgeted(1000, memory_budget=100, spill_directory=str(tmp_path))
+    
+    assert run.value == sum(range(1000))
+    assert [stage.spilled for stage in run.stages] == [True, False]
+    assert os.listdir(tmp_path) == []
+    
+def test_evaluate_all_spill(tmp_path):
+    
+    seen = []
+    def spy(value):
+        seen.append(os.listdir(tmp_path))
+        return len(value)
+    
+    head = pyper3.Pipe.open().pipe(build)()
+    p1 = head.pipe(spy)().close()
+    p2 = head.pipe(sum)().close()
+    p3 = head.pipe(max)().close()
+    
+    results = pyper3.Pipe.evaluate_all([p1, p2, p3], 1000, memory_budget=100, spill_directory=str(tmp_path))
+    
+    assert results == [1000, sum(range(1000)), 999]
+    assert len(seen) == 1 and len(seen[0]) == 1
+    assert os.listdir(tmp_path) == []
+    
+def test_evaluate_all_cleanup(tmp_path):
+    
+    def fail(value):
+        raise ValueError("failed")
+    
+    head = pyper3.Pipe.open().pipe(build)()
+    p1 = head.pipe(fail)().close()
+    p2 = head.pipe(sum)().close()
+    
+    try:
+        pyper3.Pipe.evaluate_all([p1, p2], 1000, memory_budget=100, spill_directory=str(tmp_path))
+        assert False
+    except ValueError:
+        assert True
+    
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,125 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+from operator import add, mul, neg
+
+calls = []
+
+def record(value):
+    calls.append(value)
+    return value
+
+def is_even(value):
+    return value % 2 == 0
+
+def is_negative(value):
+    return value < 0
+
+def test_open_pipe_if():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .pipe_if(is_even, neg)()
+        .pipe(add)(1)
+        .close()
+    )
+    
+    assert closed_pipe(2) == -1
+    assert closed_pipe(3) == 4
+    
+def test_push_pipe_if():
+    
+    b = (
+        pyper3.Pipe
+        .push(3)
+        .pipe_if(is_even, neg)()
+        .pipe_if(lambda value: not is_even(value), mul)(2)
+        .pop()
+    )
+    
+    assert b == 6
+    
+def test_open_until():
+    
+    calls.clear()
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .pipe(neg)()
+        .until(is_negative)
+        .pipe(record)()
+        .close()
+    )
+    
+    assert closed_pipe(2) == -2
+    assert closed_pipe(-2) == 2
+    assert calls == [2]
+    
+def test_push_until():
+    
+    calls.clear()
+    b = (
+        pyper3.Pipe
+        .push(2)
+        .pipe(neg)()
+        .until(is_negative)
+        .pipe(record)()
+        .pipe(add)(1)
+        .pop()
+    )
+    
+    assert b == -2
+    assert calls == []
+
+def test_exit():
+    
+    cache = {1: "cached"}
+    calls.clear()
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .pipe(lambda key: pyper3.Pipe.exit(cache[key]) if key in cache else key)()
+        .pipe(record)()
+        .pipe(str)()
+        .close()
+    )
+    
+    assert closed_pipe(1) == "cached"
+    assert closed_pipe(2) == "2"
+    assert calls == [2]
+    
+def test_exit_inner_pipe():
+    
+    inner_pipe = pyper3.Pipe.open().pipe(pyper3.Pipe.exit)().pipe(neg)().close()
+    outer_pipe = pyper3.Pipe.open().pipe(inner_pipe)().pipe(add)(1).close()
+    
+    assert outer_pipe(1) == 2
+    
+def test_filter():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .filter(is_even)
+        .pipe(mul)(10)
+        .close()
+    )
+    
+    assert list(closed_pipe.map(range(6))) == [0, 20, 40]
+    assert closed_pipe(3) is None
+    
+def test_filter_processes():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .filter(is_even)
+        .until(is_negative)
+        .pipe(mul)(10)
+        .close()
+    )
+    
+    assert list(closed_pipe.map([-2, -1, 0, 1, 2], processes=2)) == [-2, 0, 20]
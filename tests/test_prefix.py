@@ -0,0 +1,53 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+from operator import add, mul, neg
+
+calls = []
+
+def parse(value):
+    calls.append(value)
+    return int(value)
+
+def test_shared_prefix():
+    
+    calls.clear()
+    head = pyper3.Pipe.open().pipe(parse)().pipe(neg)()
+    p1 = head.pipe(add)(1).close()
+    p2 = head.pipe(mul)(2).close()
+    p3 = head.pipe(mul)(2).pipe(add)(1).close()
+    p4 = head.close()
+    
+    assert pyper3.Pipe.evaluate_all([p1, p2, p3, p4], "3") == [-2, -6, -5, -3]
+    assert calls == ["3"]
+    
+def test_unshared_pipes():
+    
+    calls.clear()
+    p1 = pyper3.Pipe.open().pipe(parse)().close()
+    p2 = pyper3.Pipe.open().pipe(parse)().pipe(neg)().close()
+    
+    assert pyper3.Pipe.evaluate_all([p1, p2, p1], "3") == [3, -3, 3]
+    assert calls == ["3", "3"]
+    
+def test_copy_after_fork():
+    
+    head = pyper3.Pipe.open().pipe(pyper3.THIS.copy)()
+    p1 = head.pipe(pyper3.THIS.append, inplace="shallow")(1).close()
+    p2 = head.pipe(pyper3.THIS.append, inplace="shallow")(2).close()
+    p3 = head.close()
+    
+    assert pyper3.Pipe.evaluate_all([p1, p2, p3], []) == [[1], [2], []]
+    
+def test_exit_in_prefix():
+    
+    calls.clear()
+    head = pyper3.Pipe.open().until(lambda value: value == "skip").pipe(parse)()
+    p1 = head.pipe(neg)().close()
+    p2 = head.filter(lambda value: value > 5).close()
+    
+    assert pyper3.Pipe.evaluate_all([p1, p2], "skip") == ["skip", "skip"]
+    assert pyper3.Pipe.evaluate_all([p1, p2], "3") == [-3, None]
+    assert calls == ["3"]
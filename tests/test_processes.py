@@ -0,0 +1,115 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import array
+import os
+import pytest
+from operator import add
+
+BIG = 1 << 16
+
+def checksum(view):
+    return sum(view[::4096])
+
+def identity(value):
+    return value
+
+def describe(view):
+    return (view.format, view.itemsize, view.shape, view[1])
+
+def fields(values):
+    return (values.dtype.names, values["x"].tolist())
+
+def fail(value):
+    raise ValueError("failed")
+
+def shared_memory_segments():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+def test_map_in_process():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close()
+    
+    assert list(closed_pipe.map(range(5))) == [1, 2, 3, 4, 5]
+    
+def test_map_processes():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).pipe(pyper3.THIS.real)().close()
+    
+    assert list(closed_pipe.map(range(10), processes=2)) == list(range(1, 11))
+
+def test_shared_input():
+    
+    before = shared_memory_segments()
+    closed_pipe = pyper3.Pipe.open().pipe(checksum)().close()
+    data = [bytes([i]) * BIG for i in range(4)]
+    
+    results = list(closed_pipe.map(data, processes=2, shared_memory_threshold=BIG))
+    
+    assert results == [checksum(d) for d in data]
+    assert shared_memory_segments() == before
+    
+def test_shared_output():
+    
+    before = shared_memory_segments()
+    closed_pipe = pyper3.Pipe.open().pipe(identity)().close()
+    data = [b"a" * BIG, bytearray(b"b" * BIG), b"small"]
+    
+    results = list(closed_pipe.map(data, processes=2, shared_memory_threshold=BIG))
+    
+    assert results == [b"a" * BIG, b"b" * BIG, b"small"]
+    assert shared_memory_segments() == before
+    
+def test_shared_typed_memoryview():
+    
+    before = shared_memory_segments()
+    closed_pipe = pyper3.Pipe.open().pipe(describe)().close()
+    view = memoryview(array.array("d", [0.5 * i for i in range(BIG // 8)]))
+    
+    results = list(closed_pipe.map([view], processes=1, shared_memory_threshold=BIG))
+    
+    assert results == [describe(view)] == [("d", 8, (BIG // 8,), 0.5)]
+    assert shared_memory_segments() == before
+    
+def test_shared_structured_array():
+    
+    numpy = pytest.importorskip("numpy")
+    closed_pipe = pyper3.Pipe.open().pipe(fields)().close()
+    values = numpy.zeros(BIG, dtype=[("x", "i4"), ("y", "f8")])
+    values["x"] = 7
+    
+    results = list(closed_pipe.map([values], processes=1, shared_memory_threshold=BIG))
+    
+    assert results == [fields(values)]
+    
+def test_pickled_without_threshold():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(bytes.upper)().close()
+    
+    assert list(closed_pipe.map([b"a" * BIG], processes=1, shared_memory_threshold=None)) == [b"A" * BIG]
+    
+def test_failure_cleanup():
+    
+    before = shared_memory_segments()
+    closed_pipe = pyper3.Pipe.open().pipe(fail)().close()
+    
+    try:
+        list(closed_pipe.map([b"a" * BIG] * 3, processes=1, shared_memory_threshold=BIG))
+        assert False
+    except ValueError:
+        assert True
+    
+    assert shared_memory_segments() == before
+    
+def test_early_close_cleanup():
+    
+    before = shared_memory_segments()
+    closed_pipe = pyper3.Pipe.open().pipe(identity)().close()
+    
+    results = closed_pipe.map([b"a" * BIG] * 8, processes=2, shared_memory_threshold=BIG)
+    assert next(results) == b"a" * BIG
+    results.close()
+    
+    assert shared_memory_segments() == before
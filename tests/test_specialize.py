@@ -0,0 +1,131 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import gc
+import pickle
+import weakref
+from operator import add
+
+class Slotted:
+    __slots__ = ('values',)
+    def __init__(self, values):
+        self.values = values
+    def total(self):
+        return sum(self.values)
+    
+class Shadowed:
+    def total(self):
+        return 0
+
+def test_results_unchanged():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.upper)().pipe(pyper3.THIS.split)("-").pipe(len)().close(specialize=2)
+    
+    for _ in range(5):
+        assert closed_pipe("a-b-c") == 3
+    
+    assert str in closed_pipe._specialization.paths
+    
+def test_method_resolved():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.total)().close(specialize=1)
+    
+    assert closed_pipe(Slotted([1, 2])) == 3
+    assert closed_pipe(Slotted([3, 4])) == 7
+    
+    path = closed_pipe._specialization.paths[Slotted]
+    assert path[0][0] is Slotted
+    
+def test_builtin_method_resolved():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.upper)().close(specialize=1)
+    
+    assert closed_pipe("a") == "A"
+    assert closed_pipe("b") == "B"
+    
+    path = closed_pipe._specialization.paths[str]
+    assert path[0][1] is not closed_pipe.stages[0].apply
+    
+def test_reassigned_method():
+    
+    class Reassigned:
+        __slots__ = ()
+        def get(self):
+            return 1
+        
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.get)().close(specialize=1)
+    
+    for _ in range(3):
+        assert closed_pipe(Reassigned()) == 1
+        
+    Reassigned.get = lambda self: 2
+    
+    assert closed_pipe(Reassigned()) == 2
+    
+def test_shadowed_method():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.total)().close(specialize=1)
+    shadowed = Shadowed()
+    shadowed.total = lambda: 5
+    
+    assert closed_pipe(Shadowed()) == 0
+    assert closed_pipe(shadowed) == 5
+    
+def test_guard_fallback():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(lambda value: value[0])().pipe(pyper3.THIS.real)().close(specialize=1)
+    
+    assert closed_pipe([1]) == 1
+    assert closed_pipe([2]) == 2
+    assert closed_pipe([3 + 4j]) == 3.0
+    assert closed_pipe([True]) == 1
+    
+def test_polymorphic_inputs():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close(specialize=2)
+    
+    for value in [1, 1.5, 1, 1.5, True, 1, 1.5]:
+        assert closed_pipe(value) == value + 1
+        
+    assert set(closed_pipe._specialization.paths) == {int, float}
+    
+def test_exit_and_inplace():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .until(lambda value: len(value) > 3)
+        .pipe(pyper3.THIS.append, inplace="shallow")(0)
+        .close(specialize=1)
+    )
+    
+    for _ in range(3):
+        assert closed_pipe([1]) == [1, 0]
+        assert closed_pipe([1, 2, 3, 4]) == [1, 2, 3, 4]
+        
+def test_many_types_not_kept():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(pyper3.THIS.real)().close(specialize=2)
+    classes = [type(f"Number{i}", (int,), {}) for i in range(1000)]
+    references = [weakref.ref(cls) for cls in classes]
+    
+    for cls in classes:
+        assert closed_pipe(cls(1)) == 1
+    
+    del classes, cls
+    gc.collect()
+    
+    assert len(closed_pipe._specialization.counts) <= pyper3._MAX_COUNTED_TYPES
+    assert sum(reference() is not None for reference in references) <= pyper3._MAX_COUNTED_TYPES
+    
+def test_pickle():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close(specialize=3)
+    closed_pipe(1)
+    
+    copy = pickle.loads(pickle.dumps(closed_pipe))
+    
+    assert copy.specialize == 3
+    assert copy(1) == 2
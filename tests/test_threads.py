@@ -0,0 +1,86 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from operator import add, mul
+
+THREADS = 16
+CALLS = 2000
+
+def test_immutable():
+    
+    closed_pipe = pyper3.Pipe.open("immutable").pipe(add)(1).close()
+    
+    try:
+        closed_pipe.name = "renamed"
+        assert False
+    except AttributeError:
+        assert True
+    
+    assert closed_pipe.__name__ == "immutable"
+    
+def test_shared_opening():
+    
+    opened_pipe = pyper3.Pipe.open("shared").pipe(add)(1)
+    p1 = opened_pipe.close()
+    p2 = opened_pipe.pipe(mul)(2).close()
+    
+    assert p1(1) == 2
+    assert p2(1) == 4
+    assert p1.__name__ == p2.__name__ == "shared"
+
+def test_concurrent_calls():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .pipe(add)([0])
+        .pipe(pyper3.THIS.append, inplace="shallow")(1)
+        .pipe(mul)(2)
+        .close()
+    )
+    
+    quiet_logger = logging.getLogger("test_threads.quiet")
+    quiet_logger.setLevel(logging.WARNING)
+    
+    def work(i):
+        with pyper3.Pipe.log_context(quiet_logger):
+            return [closed_pipe(i + [j]) for j in range(CALLS)]
+    
+    with ThreadPoolExecutor(THREADS) as executor:
+        results = list(executor.map(work, [[i] for i in range(THREADS)]))
+        
+    for i, result in enumerate(results):
+        assert result == [[i, j, 0, 1, i, j, 0, 1] for j in range(CALLS)]
+        
+def test_log_context_per_thread():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close()
+    barrier = threading.Barrier(THREADS)
+    records = [[] for _ in range(THREADS)]
+    
+    class ListHandler(logging.Handler):
+        def __init__(self, records):
+            super().__init__()
+            self.records = records
+        def emit(self, record):
+            self.records.append(record.getMessage())
+    
+    def work(i):
+        logger = logging.getLogger(f"test_threads.{i}")
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(ListHandler(records[i]))
+        with pyper3.Pipe.log_context(logger):
+            barrier.wait()
+            closed_pipe(i)
+    
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(work, range(THREADS)))
+    
+    for i, messages in enumerate(records):
+        assert messages == [f'add was called with args [{i}, 1] and kwargs {{}}']
@@ -0,0 +1,111 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import functools
+import random
+import statistics
+
+def test_aggregators():
+    
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    
+    for aggregate, expected in ((pyper3.Count, 8), (pyper3.Sum, 31), (pyper3.Mean, 31 / 8), (pyper3.Min, 1), (pyper3.Max, 9)):
+        aggregator = aggregate()
+        for value in values:
+            aggregator.add(value)
+        assert aggregator.result() == expected
+        
+def test_quantile():
+    
+    values = list(range(101))
+    random.Random(0).shuffle(values)
+    
+    exact = pyper3.Quantile(0.25, size=200)
+    approximate = pyper3.Quantile(0.9, size=16)
+    for value in values:
+        exact.add(value)
+        approximate.add(value)
+    
+    assert exact.result() == 25
+    assert abs(approximate.result() - 90) <= 5
+    assert len(approximate.means) == 16
+    
+def test_quantile_merge():
+    
+    first, second = pyper3.Quantile(0.5), pyper3.Quantile(0.5)
+    for value in range(50):
+        first.add(value)
+        second.add(value + 50)
+    first.merge(second)
+    
+    assert abs(first.result() - statistics.median(range(100))) <= 2
+
+def test_tumbling():
+    
+    closed_pipe = (
+        pyper3.Pipe
+        .open()
+        .pipe(pyper3.Pipe.tumbling(3, pyper3.Sum))()
+        .pipe(list)()
+        .close()
+    )
+    
+    assert closed_pipe(range(8)) == [(0, None, 3), (3, None, 12), (6, None, 13)]
+    
+def test_tumbling_lazy():
+    
+    def events():
+        yield from range(3)
+        raise AssertionError("window was not yielded as soon as it ended")
+    
+    assert next(pyper3.Pipe.tumbling(3, pyper3.Max)(events())) == (0, None, 2)
+
+def test_sliding():
+    
+    windows = pyper3.Pipe.sliding(4, 2, pyper3.Mean)(range(9))
+    
+    assert list(windows) == [(0, None, 1.5), (2, None, 3.5), (4, None, 5.5), (6, None, 7)]
+    
+def test_sliding_short():
+    
+    assert list(pyper3.Pipe.sliding(4, 2, pyper3.Count)([1, 2])) == [(0, None, 2)]
+    
+def test_keyed_tumbling():
+    
+    events = [{"user": "a", "amount": 1}, {"user": "b", "amount": 2}, {"user": "a", "amount": 3}, {"user": "b", "amount": 4}, {"user": "a", "amount": 5}]
+    windows = pyper3.Pipe.tumbling(2, pyper3.Sum, key=pyper3.THIS["user"], value=pyper3.THIS["amount"])
+    
+    assert list(windows(events)) == [(0, "a", 4), (0, "b", 6), (2, "a", 5)]
+    
+def test_time_windows():
+    
+    events = [(0.5, 1), (1.5, 2), (2.5, 3), (6.5, 4)]
+    time, value = pyper3.THIS[0], pyper3.THIS[1]
+    
+    tumbling = pyper3.Pipe.tumbling(2, pyper3.Sum, time=time, value=value)
+    sliding = pyper3.Pipe.sliding(2, 1, pyper3.Sum, time=time, value=value)
+    
+    assert list(tumbling(events)) == [(0, None, 3), (2, None, 3), (6, None, 4)]
+    assert list(sliding(events)) == [(-1, None, 1), (0, None, 3), (1, None, 5), (2, None, 3), (5, None, 4), (6, None, 4)]
+    
+def test_float_time_windows():
+    
+    events = [(0.05, 1), (0.15, 2), (0.25, 3)]
+    sliding = pyper3.Pipe.sliding(0.3, 0.1, pyper3.Sum, time=pyper3.THIS[0], value=pyper3.THIS[1])
+    
+    assert [result.value for result in sliding(events)] == [1, 3, 6, 5, 3]
+    
+    try:
+        pyper3.Pipe.sliding(0.3, 0.2, pyper3.Sum, time=pyper3.THIS[0])
+        assert False
+    except ValueError:
+        assert True
+        
+def test_running():
+    
+    median = functools.partial(pyper3.Quantile, 0.5)
+    
+    assert list(pyper3.Pipe.running(pyper3.Max)([1, 3, 2])) == [1, 3, 3]
+    assert list(pyper3.Pipe.running(median, key=pyper3.THIS.real)([1, 1, 3, 2])) == [(1, 1), (1, 1), (3, 3), (2, 2)]
@@ -0,0 +1,130 @@
+import sys
+sys.path.append('..')
+import pyper3
+sys.path.remove('..')
+
+import multiprocessing
+from operator import add, truediv
+
+class UnpicklableError(Exception):
+    
+    def __init__(self, value):
+        super().__init__(value)
+        self.callback = lambda: value
+        
+def fail(value):
+    if value == 2:
+        raise UnpicklableError(value)
+    return value
+
+def test_unix_workers():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).pipe(pyper3.THIS.real)().close()
+    
+    with pyper3.Pipe.start_workers(2) as workers:
+        results = list(closed_pipe.map(range(100), workers=workers.addresses, batch_size=8))
+        
+    assert results == list(range(1, 101))
+    
+def test_tcp_workers():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close()
+    
+    with pyper3.Pipe.start_workers(1, family="AF_INET") as workers:
+        assert workers.addresses[0][0] == '127.0.0.1'
+        results = list(closed_pipe.map(range(10), workers=workers.addresses))
+        
+    assert results == list(range(1, 11))
+    
+def test_pooled_connections():
+    
+    p1 = pyper3.Pipe.open().pipe(add)(1).close()
+    p2 = pyper3.Pipe.open().pipe(add)(2).close()
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        assert list(p1.map(range(3), workers=workers.addresses)) == [1, 2, 3]
+        assert list(p2.map(range(3), workers=workers.addresses)) == [2, 3, 4]
+        assert list(p1.map(range(3), workers=workers.addresses)) == [1, 2, 3]
+        
+        pool = pyper3._connection_pool[(workers.addresses[0], multiprocessing.current_process().authkey)]
+        assert len(pool) == 1
+        assert len(pool[0].loaded) == 2
+        
+def test_pipe_error():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(truediv)(1, pyper3.THIS).close()
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        results = closed_pipe.map([1, 2, 0, 4], workers=workers.addresses)
+        assert next(results) == 1.0
+        assert next(results) == 0.5
+        try:
+            next(results)
+            assert False
+        except ZeroDivisionError:
+            assert True
+            
+def test_worker_failure_retry():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close()
+    
+    with pyper3.Pipe.start_workers(2) as workers:
+        assert list(closed_pipe.map(range(20), workers=workers.addresses, batch_size=2)) == list(range(1, 21))
+        
+        workers.processes[0].terminate()
+        workers.processes[0].join()
+        
+        assert list(closed_pipe.map(range(20), workers=workers.addresses, batch_size=2)) == list(range(1, 21))
+        
+def test_all_workers_failed():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(add)(1).close()
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        addresses = workers.addresses
+    
+    try:
+        list(closed_pipe.map(range(3), workers=addresses))
+        assert False
+    except ConnectionError:
+        assert True
+        
+def test_unpicklable_error():
+    
+    closed_pipe = pyper3.Pipe.open().pipe(fail)().close()
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        results = closed_pipe.map(range(4), workers=workers.addresses, batch_size=4)
+        try:
+            list(results)
+            assert False
+        except RuntimeError as error:
+            assert "UnpicklableError(2)" in str(error)
+            
+def test_unpicklable_dead_letter():
+    
+    letters = []
+    closed_pipe = pyper3.Pipe.open().pipe(fail)().close(errors=letters.append)
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        assert list(closed_pipe.map(range(4), workers=workers.addresses)) == [0, 1, 3]
+        
+    assert [(letter.stage, letter.input, type(letter.error)) for letter in letters] == [("fail", 2, RuntimeError)]
+    assert "UnpicklableError(2)" in str(letters[0].error)
+    
+def test_missing_module(tmp_path):
+    
+    (tmp_path / "client_only.py").write_text("def increment(value):\n    return value + 1\n")
+    
+    with pyper3.Pipe.start_workers(1) as workers:
+        sys.path.insert(0, str(tmp_path))
+        try:
+            import client_only
+            closed_pipe = pyper3.Pipe.open().pipe(client_only.increment)().close()
+            list(closed_pipe.map(range(3), workers=workers.addresses))
+            assert False
+        except ModuleNotFoundError as error:
+            assert error.name == "client_only"
+        finally:
+            sys.path.remove(str(tmp_path))
+            sys.modules.pop("client_only", None)